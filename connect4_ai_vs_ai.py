@@ -1,274 +1,124 @@
-import numpy as np
 import random
 import pygame
-import sys
-import math
-
-BLUE = (0,0,255)
-BLACK = (0,0,0)
-RED = (255,0,0)
-YELLOW = (255,255,0)
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
+from engine.bitboard import (
+	create_board, drop_piece, is_valid_location, get_next_open_row,
+	get_valid_locations, winning_move, print_board
+)
+from engine.parallel import RootSearchPool
+from engine.player import Player
+from engine.book import OpeningBook
+from engine.background import BackgroundSearch
+from engine.archive import DEFAULT_ARCHIVE_PATH, GameRecorder
+from engine.render import RED, YELLOW, WHITE, FPS, BoardView, open_window, leaves_game
 
 AI1 = 0
 AI2 = 1
 
-EMPTY = 0
 AI1_PIECE = 1
 AI2_PIECE = 2
 
-WINDOW_LENGTH = 4
-
-def create_board():
-	board = np.zeros((ROW_COUNT,COLUMN_COUNT))
-	return board
-
-#validate column
-def is_valid_location(board, col):
-	return board[ROW_COUNT-1][col] == 0
-
-#validate row
-def get_next_open_row(board, col):
-	for r in range(ROW_COUNT):
-		if board[r][col] == 0:
-			return r
-
-def drop_piece(board, row, col, piece):
-	board[row][col] = piece
-
-def print_board(board):
-	print(np.flip(board, 0))
-
-def winning_move(board, piece):
-	# Check horizontal locations for win
-	for c in range(COLUMN_COUNT-3):#0 to 3
-		for r in range(ROW_COUNT):
-			if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-				return True
-
-	# Check vertical locations for win
-	for c in range(COLUMN_COUNT):
-		for r in range(ROW_COUNT-3):
-			if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-				return True
-
-	# Check positively sloped diaganols
-	for c in range(COLUMN_COUNT-3):
-		for r in range(ROW_COUNT-3):
-			if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-				return True
-
-	# Check negatively sloped diaganols
-	for c in range(COLUMN_COUNT-3):
-		for r in range(3, ROW_COUNT):
-			if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-				return True
-
-def evaluate_window(window, piece):
-	score = 0
-	opp_piece = AI1_PIECE
-	if piece == AI1_PIECE:
-		opp_piece = AI2_PIECE
-	# window = [1,1,1,1] p = 1 opp = 2
-	if window.count(piece) == 4:
-		score += 100
-	elif window.count(piece) == 3 and window.count(EMPTY) == 1:
-		score += 5
-	elif window.count(piece) == 2 and window.count(EMPTY) == 2:
-		score += 2
-
-	if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
-		score -= 4
-
-	return score
-
-def score_position(board, piece):
-	score = 0
-
-	## Score center column
-	center_array = [int(i) for i in list(board[:, COLUMN_COUNT//2])]
-	center_count = center_array.count(piece)
-	score += center_count * 3
-
-	## Score Horizontal
-	for r in range(ROW_COUNT):
-		row_array = [int(i) for i in list(board[r,:])]
-		for c in range(COLUMN_COUNT-3):
-			window = row_array[c:c+WINDOW_LENGTH]
-			score += evaluate_window(window, piece)
-
-	## Score Vertical
-	for c in range(COLUMN_COUNT):
-		col_array = [int(i) for i in list(board[:,c])]
-		for r in range(ROW_COUNT-3):
-			window = col_array[r:r+WINDOW_LENGTH]
-			score += evaluate_window(window, piece)
-
-	## Score posiive sloped diagonal
-	for r in range(ROW_COUNT-3):
-		for c in range(COLUMN_COUNT-3):
-			window = [board[r+i][c+i] for i in range(WINDOW_LENGTH)]
-			score += evaluate_window(window, piece)
-
-	for r in range(ROW_COUNT-3):
-		for c in range(COLUMN_COUNT-3):
-			window = [board[r+3-i][c+i] for i in range(WINDOW_LENGTH)]
-			score += evaluate_window(window, piece)
-
-	return score
-
-#all valid locations (columns)
-def get_valid_locations(board):
-	valid_locations = []
-	for col in range(COLUMN_COUNT):
-		if is_valid_location(board, col):
-			valid_locations.append(col)
-	return valid_locations
-
-
-def is_terminal_node(board):
-	return winning_move(board, AI1_PIECE) or winning_move(board, AI2_PIECE) or len(get_valid_locations(board)) == 0
-
-def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
-	valid_locations = get_valid_locations(board)
-	is_terminal = is_terminal_node(board)
-	if depth == 0 or is_terminal:
-		if is_terminal:
-			if winning_move(board, piece):
-				return (None, 100000000000000)
-			elif winning_move(board, AI1_PIECE if piece == AI2_PIECE else AI2_PIECE):
-				return (None, -10000000000000)
-			else: # Game is over, no more valid moves
-				return (None, 0)
-		else: # Depth is zero
-			return (None, score_position(board, piece))
-	if maximizingPlayer:
-		value = -math.inf
-		column = random.choice(valid_locations)
-		for col in valid_locations:
-			row = get_next_open_row(board, col)
-			b_copy = board.copy()
-			drop_piece(b_copy, row, col, piece)
-			new_score = minimax(b_copy, depth-1, alpha, beta, False, piece)[1]
-			if new_score > value:
-				value = new_score
-				column = col
-			alpha = max(alpha, value)
-			if alpha >= beta:
-				break
-		return column, value
-
-	else: # Minimizing player
-		value = math.inf
-		column = random.choice(valid_locations)
-		opp_piece = AI1_PIECE if piece == AI2_PIECE else AI2_PIECE
-		for col in valid_locations:
-			row = get_next_open_row(board, col)
-			b_copy = board.copy()
-			drop_piece(b_copy, row, col, opp_piece)
-			new_score = minimax(b_copy, depth-1, alpha, beta, True, piece)[1]
-			if new_score < value:
-				value = new_score
-				column = col
-			beta = min(beta, value)
-			if alpha >= beta:
-				break
-		return column, value
-
-###############################################
-
-def draw_board(board):
-	for c in range(COLUMN_COUNT):
-		for r in range(ROW_COUNT):
-			pygame.draw.rect(screen, BLUE, (c*SQUARESIZE, r*SQUARESIZE+SQUARESIZE, SQUARESIZE, SQUARESIZE))
-			pygame.draw.circle(screen, BLACK, (int(c*SQUARESIZE+SQUARESIZE/2), int(r*SQUARESIZE+SQUARESIZE+SQUARESIZE/2)), RADIUS)
-	
-	for c in range(COLUMN_COUNT):
-		for r in range(ROW_COUNT):		
-			if board[r][c] == AI1_PIECE:
-				pygame.draw.circle(screen, RED, (int(c*SQUARESIZE+SQUARESIZE/2), height-int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-			elif board[r][c] == AI2_PIECE: 
-				pygame.draw.circle(screen, YELLOW, (int(c*SQUARESIZE+SQUARESIZE/2), height-int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-	pygame.display.update()
+AI_DEPTH = 5
+AI_TIME_MS = None  # set to a per-move budget in ms to search by time instead
+BOOK_MIN_DEPTH = 5  # the opening book (depth 8) is for searches at least this deep
+AI_WORKERS = 1  # >1 searches the root moves in that many processes
+AI_EVALUATORS = {AI1: "window", AI2: "window"}  # or "threat"
+AI_ENGINES = {AI1: "minimax", AI2: "minimax"}  # or "mcts": Monte Carlo tree search
+AI_STATS = None  # "print", or a file to append one JSON line of search stats per move to
+MOVE_DELAY_MS = 500  # shortest time between two moves, to watch the game
+ARCHIVE_PATH = DEFAULT_ARCHIVE_PATH  # finished games are saved here; None to turn off
 
 ######main#########
 
-board = create_board()
-print_board(board)
-game_over = False
-
-pygame.init()
-
-SQUARESIZE = 100
-
-width = COLUMN_COUNT * SQUARESIZE
-height = (ROW_COUNT+1) * SQUARESIZE
-
-size = (width, height)
-
-RADIUS = int(SQUARESIZE/2 - 5)
-
-screen = pygame.display.set_mode(size)
-draw_board(board)
-pygame.display.update()
-
-myfont = pygame.font.SysFont("monospace", 75)
-
-turn = random.randint(AI1, AI2)
-
-while not game_over:
-
-	for event in pygame.event.get():
-		if event.type == pygame.QUIT:
-			sys.exit()
-
-	# AI1's turn
-	if turn == AI1 and not game_over:
-		col, minimax_score = minimax(board, 5, -math.inf, math.inf, True, AI1_PIECE)
-
-		if is_valid_location(board, col):
-			pygame.time.wait(500)  # Add delay to watch the game
-			row = get_next_open_row(board, col)
-			drop_piece(board, row, col, AI1_PIECE)
-
-			if winning_move(board, AI1_PIECE):
-				label = myfont.render("AI 1 wins!!", 1, RED)
-				screen.blit(label, (40,10))
-				game_over = True
-
-			print_board(board)
-			draw_board(board)
-
-			turn += 1
-			turn = turn % 2
-
-	# AI2's turn
-	if turn == AI2 and not game_over:
-		col, minimax_score = minimax(board, 5, -math.inf, math.inf, True, AI2_PIECE)
-
-		if is_valid_location(board, col):
-			pygame.time.wait(500)  # Add delay to watch the game
-			row = get_next_open_row(board, col)
-			drop_piece(board, row, col, AI2_PIECE)
-
-			if winning_move(board, AI2_PIECE):
-				label = myfont.render("AI 2 wins!!", 1, YELLOW)
-				screen.blit(label, (40,10))
-				game_over = True
-
-			print_board(board)
-			draw_board(board)
-
-			turn += 1
-			turn = turn % 2
-	#check for draw
-	elif len(get_valid_locations(board)) == 0:
-		label = myfont.render("Draw!", 1, (255,255,255))
-		screen.blit(label, (40,10))
-		game_over = True
-
-		
-	if game_over:
-		pygame.time.wait(5000)
\ No newline at end of file
+def main():
+	global AI1_PIECE, AI2_PIECE
+	board = create_board()
+	turn = random.randint(AI1, AI2)
+	# the engine takes piece 1 to be the side that moved first (solver, book)
+	AI1_PIECE, AI2_PIECE = (1, 2) if turn == AI1 else (2, 1)
+	colors = {AI1_PIECE: RED, AI2_PIECE: YELLOW}
+	book = None
+	if AI_TIME_MS is not None or AI_DEPTH >= BOOK_MIN_DEPTH:
+		book = OpeningBook.open_if_exists()
+	pool = RootSearchPool(AI_WORKERS) if AI_WORKERS > 1 else None
+	# one player per AI, with its own table (stored scores are from that AI's
+	# point of view) and MCTS tree; they share the book and the pool
+	players = {piece: Player(depth=AI_DEPTH, time_ms=AI_TIME_MS,
+		evaluator=AI_EVALUATORS[ai], engine=AI_ENGINES[ai], book=book,
+		pool=pool, report=AI_STATS)
+		for ai, piece in ((AI1, AI1_PIECE), (AI2, AI2_PIECE))}
+	print_board(board)
+	game_over = False
+
+	screen = open_window("Connect 4 - AI vs AI")
+	view = BoardView(screen, colors)
+	view.draw(board)
+
+	myfont = pygame.font.SysFont("monospace", 75)
+
+	# the AIs think on a worker thread while this loop keeps handling events
+	search = BackgroundSearch()
+	clock = pygame.time.Clock()
+	shown = pygame.time.get_ticks()
+	pending = None
+	recorder = GameRecorder()
+	winner = 0
+
+	try:
+		while not game_over:
+			clock.tick(FPS)
+
+			for event in pygame.event.get():
+				if leaves_game(event):
+					return
+
+			piece = AI1_PIECE if turn == AI1 else AI2_PIECE
+			if pending is None and not search.busy():
+				search.start(players[piece].timed_move, board.copy(), piece)
+			if pending is None:
+				pending = search.poll()
+			# Add delay to watch the game
+			if pending is None or pygame.time.get_ticks() - shown < MOVE_DELAY_MS:
+				continue
+			col, minimax_score = pending
+			pending = None
+
+			if is_valid_location(board, col):
+				row = get_next_open_row(board, col)
+				drop_piece(board, row, col, piece)
+				recorder.played(col)
+
+				if winning_move(board, piece):
+					text, color = ("AI 1 wins!!", RED) if turn == AI1 else ("AI 2 wins!!", YELLOW)
+					view.message(myfont, text, color, (40,10))
+					game_over = True
+					winner = piece
+				#check for draw
+				elif len(get_valid_locations(board)) == 0:
+					view.message(myfont, "Draw!", WHITE, (40,10))
+					game_over = True
+
+				print_board(board)
+				view.draw(board)
+				shown = pygame.time.get_ticks()
+
+				turn += 1
+				turn = turn % 2
+
+			if game_over:
+				if ARCHIVE_PATH:
+					first, second = ("ai1", "ai2") if AI1_PIECE == 1 else ("ai2", "ai1")
+					recorder.save(ARCHIVE_PATH, "aivai", first, second, winner,
+						AI_DEPTH if AI_TIME_MS is None else None,
+						{"engines": [AI_ENGINES[AI1], AI_ENGINES[AI2]],
+						"evaluators": [AI_EVALUATORS[AI1], AI_EVALUATORS[AI2]],
+						"time_ms": AI_TIME_MS, "workers": AI_WORKERS})
+				pygame.time.wait(5000)
+	finally:
+		search.close()
+		if pool is not None:
+			pool.close()
+		if book is not None:
+			book.close()
+
+if __name__ == "__main__":
+	main()
@@ -1,252 +1,225 @@
-import numpy as np
+import os
 import random
 import pygame
-import sys
-import math
-
-BLUE = (0,0,255)
-BLACK = (0,0,0)
-RED = (255,0,0)
-YELLOW = (255,255,0)
-WHITE = (255,255,255)
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, create_board, drop_piece, is_valid_location,
+    get_next_open_row, get_valid_locations, winning_move, last_move_wins,
+    is_draw
+)
+from engine.evaluation import score_position
+from engine.parallel import RootSearchPool
+from engine.player import Player
+from engine.book import OpeningBook
+from engine.background import BackgroundSearch
+from engine.archive import DEFAULT_ARCHIVE_PATH, GameRecorder
+from engine.render import (
+    BLUE, BLACK, RED, YELLOW, WHITE, SQUARESIZE, FPS, BoardView, open_window,
+    leaves_game
+)
 
 PLAYER = 0
 AI = 1
 
-EMPTY = 0
 PLAYER_PIECE = 1
 AI_PIECE = 2
 
-WINDOW_LENGTH = 4
 AI_DEPTH = 4
-
-def create_board():
-    return np.zeros((ROW_COUNT, COLUMN_COUNT))
-
-def drop_piece(board, row, col, piece):
-    board[row][col] = piece
-
-def is_valid_location(board, col):
-    return board[ROW_COUNT-1][col] == 0
-
-def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-
-def get_valid_locations(board):
-    return [c for c in range(COLUMN_COUNT) if is_valid_location(board, c)]
-
-def winning_move(board, piece):
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT):
-            if all(board[r][c+i] == piece for i in range(4)):
-                return True
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT-3):
-            if all(board[r+i][c] == piece for i in range(4)):
-                return True
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT-3):
-            if all(board[r+i][c+i] == piece for i in range(4)):
-                return True
-    for c in range(COLUMN_COUNT-3):
-        for r in range(3, ROW_COUNT):
-            if all(board[r-i][c+i] == piece for i in range(4)):
-                return True
-    return False
-
-def is_draw(board):
-    return len(get_valid_locations(board)) == 0 and \
-           not winning_move(board, PLAYER_PIECE) and \
-           not winning_move(board, AI_PIECE)
-
-def is_terminal_node(board):
-    return winning_move(board, PLAYER_PIECE) or \
-           winning_move(board, AI_PIECE) or \
-           len(get_valid_locations(board)) == 0
-
-def evaluate_window(window, piece):
-    score = 0
-    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
-
-    if window.count(piece) == 4:
-        score += 100
-    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
-        score += 5
-    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
-        score += 2
-
-    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
-        score -= 4
-
-    return score
-
-def score_position(board, piece):
-    score = 0
-    center_array = list(board[:, COLUMN_COUNT//2])
-    score += center_array.count(piece) * 3
-    for r in range(ROW_COUNT):
-        row_array = list(board[r,:])
-        for c in range(COLUMN_COUNT-3):
-            score += evaluate_window(row_array[c:c+4], piece)
-    for c in range(COLUMN_COUNT):
-        col_array = list(board[:,c])
-        for r in range(ROW_COUNT-3):
-            score += evaluate_window(col_array[r:r+4], piece)
-    for r in range(ROW_COUNT-3):
-        for c in range(COLUMN_COUNT-3):
-            score += evaluate_window([board[r+i][c+i] for i in range(4)], piece)
-            score += evaluate_window([board[r+3-i][c+i] for i in range(4)], piece)
-    return score
-
-def minimax(board, depth, alpha, beta, maximizingPlayer):
-    valid_locations = get_valid_locations(board)
-    is_terminal = is_terminal_node(board)
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            if winning_move(board, AI_PIECE):
-                return None, 10**14
-            elif winning_move(board, PLAYER_PIECE):
-                return None, -10**14
-            else:
-                return None, 0
-        else:
-            return None, score_position(board, AI_PIECE)
-    if maximizingPlayer:
-        value = -math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, AI_PIECE)
-            new_score = minimax(b_copy, depth-1, alpha, beta, False)[1]
-            if new_score > value:
-                value = new_score
-                column = col
-            alpha = max(alpha, value)
-            if alpha >= beta:
-                break
-        return column, value
-    else:
-        value = math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, PLAYER_PIECE)
-            new_score = minimax(b_copy, depth-1, alpha, beta, True)[1]
-            if new_score < value:
-                value = new_score
-                column = col
-            beta = min(beta, value)
-            if alpha >= beta:
-                break
-        return column, value
-
-def draw_board(board):
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT):
-            pygame.draw.rect(screen, BLUE,
-                (c*SQUARESIZE, r*SQUARESIZE+SQUARESIZE, SQUARESIZE, SQUARESIZE))
-            pygame.draw.circle(screen, BLACK,
-                (int(c*SQUARESIZE+SQUARESIZE/2),
-                 int(r*SQUARESIZE+SQUARESIZE+SQUARESIZE/2)), RADIUS)
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT):
-            if board[r][c] == PLAYER_PIECE:
-                pygame.draw.circle(screen, RED,
-                    (int(c*SQUARESIZE+SQUARESIZE/2),
-                     height-int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-            elif board[r][c] == AI_PIECE:
-                pygame.draw.circle(screen, YELLOW,
-                    (int(c*SQUARESIZE+SQUARESIZE/2),
-                     height-int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
-    pygame.display.update()
-def difficulty_menu():
-    global AI_DEPTH
-    choosing = True
+AI_TIME_MS = 1000  # per-move budget when AI_DEPTH is None
+AI_WORKERS = 1  # >1 searches the root moves of fixed-depth levels in parallel
+SOLVED = ROW_COUNT * COLUMN_COUNT  # EXPERT: search to the end of the game
+SOLVER_MAX_NODES = 100000  # beyond this, play the TIMED search instead
+SOLVER_MIN_MOVES = 16  # discs on the board before EXPERT tries the solver
+BOOK_MIN_DEPTH = 5  # the opening book (depth 8) is for HARD, TIMED and EXPERT only
+AI_EVALUATOR = "window"  # or "threat": threat-aware, as strong a ply shallower
+AI_STATS = None  # "print", or a file to append one JSON line of search stats per move to
+AI_PONDER = True  # search the player's likely replies while they think
+AI_ENGINE = "minimax"  # or "mcts": Monte Carlo tree search instead of minimax
+MCTS_ITERATIONS = 500  # per level with "mcts": EASY 1x, MEDIUM 3x, HARD 5x
+ARCHIVE_PATH = DEFAULT_ARCHIVE_PATH  # finished games are saved here; None to turn off
+
+def difficulty_menu(screen):
+    # False when the player backs out to the main menu.  Nothing moves here,
+    # so it sleeps until the next event and redraws only the CORES toggle.
+    global AI_DEPTH, AI_WORKERS
     font = pygame.font.SysFont("arial", 50)
     buttons = [
-        ("EASY", 1, pygame.Rect(200, 200, 300, 70)),
-        ("MEDIUM", 3, pygame.Rect(200, 300, 300, 70)),
-        ("HARD", 5, pygame.Rect(200, 400, 300, 70)),
+        ("EASY", 1, pygame.Rect(200, 180, 300, 64)),
+        ("MEDIUM", 3, pygame.Rect(200, 260, 300, 64)),
+        ("HARD", 5, pygame.Rect(200, 340, 300, 64)),
+        ("TIMED", None, pygame.Rect(200, 420, 300, 64)),
+        ("EXPERT", SOLVED, pygame.Rect(200, 500, 300, 64)),
     ]
-    while choosing:
-        screen.fill(BLACK)
-        title = font.render("Choose Difficulty", True, YELLOW)
-        screen.blit(title, (180, 100))
-        for text, depth, rect in buttons:
-            pygame.draw.rect(screen, BLUE, rect, border_radius=12)
-            label = font.render(text, True, WHITE)
-            screen.blit(
-                label,
-                (rect.centerx - label.get_width() // 2,
-                 rect.centery - label.get_height() // 2)
-            )
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                for text, depth, rect in buttons:
-                    if rect.collidepoint(event.pos):
-                        AI_DEPTH = depth
-                        choosing = False
-
-pygame.init()
-SQUARESIZE = 100
-width = COLUMN_COUNT * SQUARESIZE
-height = (ROW_COUNT+1) * SQUARESIZE
-screen = pygame.display.set_mode((width, height))
-RADIUS = int(SQUARESIZE/2 - 5)
-myfont = pygame.font.SysFont("monospace", 75)
-
-difficulty_menu()
-
-board = create_board()
-turn = random.randint(PLAYER, AI)
-game_over = False
-draw_board(board)
-
-while not game_over:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-        if event.type == pygame.MOUSEMOTION:
-            pygame.draw.rect(screen, BLACK, (0,0,width,SQUARESIZE))
-            if turn == PLAYER:
-                pygame.draw.circle(screen, RED, (event.pos[0], SQUARESIZE//2), RADIUS)
-            pygame.display.update()
-        if event.type == pygame.MOUSEBUTTONDOWN and turn == PLAYER:
-            col = event.pos[0] // SQUARESIZE
-            if is_valid_location(board, col):
+    cores_rect = pygame.Rect(200, 600, 300, 64)
+    labels = {
+        text: font.render(text, True, WHITE)
+        for text in [b[0] for b in buttons] + ["CORES: ALL", "CORES: 1"]
+    }
+
+    def draw_button(text, rect):
+        pygame.draw.rect(screen, BLUE, rect, border_radius=12)
+        screen.blit(labels[text], labels[text].get_rect(center=rect.center))
+        return rect
+
+    def draw_cores():
+        return draw_button("CORES: ALL" if AI_WORKERS > 1 else "CORES: 1",
+                           cores_rect)
+
+    screen.fill(BLACK)
+    screen.blit(font.render("Choose Difficulty", True, YELLOW), (180, 100))
+    for text, depth, rect in buttons:
+        draw_button(text, rect)
+    draw_cores()
+    pygame.display.update()
+    while True:
+        event = pygame.event.wait()
+        if leaves_game(event):
+            return False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if cores_rect.collidepoint(event.pos):
+                AI_WORKERS = 1 if AI_WORKERS > 1 else os.cpu_count()
+                pygame.display.update(draw_cores())
+            for text, depth, rect in buttons:
+                if rect.collidepoint(event.pos):
+                    AI_DEPTH = depth
+                    return True
+
+def likely_replies(board):
+    # the player's moves that look best for them first
+    def after(col):
+        child = board.copy()
+        drop_piece(child, get_next_open_row(child, col), col, PLAYER_PIECE)
+        return child
+    return sorted(get_valid_locations(board),
+                  key=lambda col: -score_position(after(col), PLAYER_PIECE))
+
+def ponder(board, ai, answers, cancel=None):
+    # on the player's turn: answer their likely replies in advance, filling
+    # `answers` (and the transposition table) until the player moves
+    if ai.mcts is not None:
+        # MCTS grows its tree under every reply at once; the AI's search
+        # goes on from the subtree of the reply played
+        ai.mcts.search(board, cancel=cancel)
+        return
+    for col in likely_replies(board):
+        child = board.copy()
+        row = get_next_open_row(child, col)
+        drop_piece(child, row, col, PLAYER_PIECE)
+        if last_move_wins(child, row, col, PLAYER_PIECE) or is_draw(child):
+            continue
+        answers[child.key()] = ai.measured_move(child, AI_PIECE, cancel)
+
+def main():
+    global PLAYER_PIECE, AI_PIECE
+    screen = open_window("Connect 4 - Player vs AI")
+    myfont = pygame.font.SysFont("monospace", 75)
+
+    if not difficulty_menu(screen):
+        return
+
+    board = create_board()
+    book = None
+    if AI_DEPTH is None or AI_DEPTH >= BOOK_MIN_DEPTH:
+        book = OpeningBook.open_if_exists()
+    pool = RootSearchPool(AI_WORKERS) if AI_WORKERS > 1 else None
+    timed = AI_DEPTH is None or AI_DEPTH == SOLVED
+    ai = Player(depth=None if timed else AI_DEPTH,
+                time_ms=AI_TIME_MS if timed else None,
+                evaluator=AI_EVALUATOR, engine=AI_ENGINE,
+                iterations=None if timed else AI_DEPTH * MCTS_ITERATIONS,
+                solver_nodes=SOLVER_MAX_NODES if AI_DEPTH == SOLVED else None,
+                solver_min_moves=SOLVER_MIN_MOVES,
+                book=book, pool=pool, report=AI_STATS)
+    turn = random.randint(PLAYER, AI)
+    # the engine takes piece 1 to be the side that moved first (solver, book)
+    PLAYER_PIECE, AI_PIECE = (1, 2) if turn == PLAYER else (2, 1)
+    colors = {PLAYER_PIECE: RED, AI_PIECE: YELLOW}
+    game_over = False
+    view = BoardView(screen, colors)
+    view.draw(board)
+    # the AI thinks on a worker thread while this loop keeps handling events
+    search = BackgroundSearch()
+    clock = pygame.time.Clock()
+    answers = {}  # board.key() after a player move -> (col, value, stats)
+    pondering = False
+    recorder = GameRecorder()
+    winner = 0
+
+    try:
+        while not game_over:
+            clock.tick(FPS)
+            for event in pygame.event.get():
+                if leaves_game(event):
+                    return
+                if event.type == pygame.MOUSEMOTION:
+                    view.hover(event.pos[0], RED if turn == PLAYER else None)
+                if event.type == pygame.MOUSEBUTTONDOWN and turn == PLAYER:
+                    col = event.pos[0] // SQUARESIZE
+                    if is_valid_location(board, col):
+                        search.stop()
+                        pondering = False
+                        row = get_next_open_row(board, col)
+                        drop_piece(board, row, col, PLAYER_PIECE)
+                        recorder.played(col)
+                        if winning_move(board, PLAYER_PIECE):
+                            view.message(myfont, "Player Wins!", RED, (40,10))
+                            game_over = True
+                            winner = PLAYER_PIECE
+                        elif is_draw(board):
+                            view.message(myfont, "Draw!", BLUE, (40,10))
+                            game_over = True
+                        view.draw(board)
+                        view.hover(event.pos[0])
+                        turn = AI
+
+            if turn == PLAYER and AI_PONDER and not game_over and not pondering:
+                answers.clear()
+                search.start(ponder, board.copy(), ai, answers)
+                pondering = True
+            result = None
+            if turn == AI and not game_over and not search.busy():
+                # a pondered answer is played at once; its stats are those
+                # of the search made while the player thought
+                pondered = answers.pop(board.key(), None)
+                if pondered is not None:
+                    col, value, stats = pondered
+                    ai.report_stats(board, AI_PIECE, col, value, stats,
+                                    pondered=True)
+                    result = col, value
+                else:
+                    search.start(ai.timed_move, board.copy(), AI_PIECE)
+            if result is None:
+                result = search.poll()
+            if result is not None and turn == AI:
+                col, _ = result
                 row = get_next_open_row(board, col)
-                drop_piece(board, row, col, PLAYER_PIECE)
-                if winning_move(board, PLAYER_PIECE):
-                    screen.blit(myfont.render("Player Wins!", 1, RED), (40,10))
+                drop_piece(board, row, col, AI_PIECE)
+                recorder.played(col)
+                if winning_move(board, AI_PIECE):
+                    view.message(myfont, "AI Wins!", YELLOW, (40,10))
                     game_over = True
+                    winner = AI_PIECE
                 elif is_draw(board):
-                    screen.blit(myfont.render("Draw!", 1, BLUE), (40,10))
+                    view.message(myfont, "Draw!", BLUE, (40,10))
                     game_over = True
-                draw_board(board)
-                turn = AI
-
-    if turn == AI and not game_over:
-        col, _ = minimax(board, AI_DEPTH, -math.inf, math.inf, True)
-        row = get_next_open_row(board, col)
-        drop_piece(board, row, col, AI_PIECE)
-        if winning_move(board, AI_PIECE):
-            screen.blit(myfont.render("AI Wins!", 1, YELLOW), (40,10))
-            game_over = True
-        elif is_draw(board):
-            screen.blit(myfont.render("Draw!", 1, BLUE), (40,10))
-            game_over = True
-        draw_board(board)
-        turn = PLAYER
-
-    if game_over:
-        pygame.time.wait(3000)
+                view.draw(board)
+                turn = PLAYER
+
+            view.update()
+            if game_over:
+                if ARCHIVE_PATH:
+                    first, second = ("player", "ai") if PLAYER_PIECE == 1 else ("ai", "player")
+                    recorder.save(ARCHIVE_PATH, "pvai", first, second, winner,
+                                  AI_DEPTH, {"engine": AI_ENGINE,
+                                             "evaluator": AI_EVALUATOR,
+                                             "time_ms": AI_TIME_MS if timed else None,
+                                             "workers": AI_WORKERS})
+                pygame.time.wait(3000)
+    finally:
+        search.close()
+        if pool is not None:
+            pool.close()
+        if book is not None:
+            book.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared Connect 4 game engine used by every game mode."""
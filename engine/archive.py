@@ -0,0 +1,230 @@
+"""Archive of finished games, indexed by the positions they went through.
+
+    python -m engine.archive                     # totals per mode
+    python -m engine.archive --moves 3342        # results of games through it
+    python -m engine.archive --moves 33 --loser ai --list
+
+Games live in an SQLite file: one row per game with its moves (one byte per
+ply, the column), who played each piece, the AI depth and settings, the
+winner and the timing.  Every position a game reached, the empty board
+included, is indexed under its canonical_key() in a (key, game) table, so
+"games through this position" is a range scan of that index rather than a
+replay of the games; a position and its mirror image share their games.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from array import array
+
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, canonical_key
+)
+
+DEFAULT_ARCHIVE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games.sqlite"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    first TEXT NOT NULL,  -- who played piece 1, which moves first
+    second TEXT NOT NULL,
+    depth INTEGER,  -- AI_DEPTH; NULL with a time budget
+    winner INTEGER NOT NULL,  -- piece, 0 for a draw
+    moves BLOB NOT NULL,  -- one column per ply
+    move_ms BLOB,  -- uint32 per ply: how long each move took
+    started REAL,  -- unix time
+    duration REAL,  -- seconds
+    settings TEXT  -- JSON
+);
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    game INTEGER NOT NULL,
+    PRIMARY KEY (key, game)
+) WITHOUT ROWID;
+"""
+
+
+def position_keys(moves):
+    # canonical keys of every position of the game, from the empty board on
+    board = create_board()
+    keys = [canonical_key(board)[0]]
+    for col in moves:
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+        keys.append(canonical_key(board)[0])
+    return keys
+
+
+class GameArchive:
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.db = sqlite3.connect(path)
+        # readers (an analysis script) don't block a game being saved
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def commit(self):
+        self.db.commit()
+
+    def record(self, moves, mode, first, second, winner, depth=None,
+               settings=None, started=None, duration=None, move_ms=None,
+               commit=True):
+        # returns the new game's id; bulk writers pass commit=False and
+        # call commit() every so many games
+        cursor = self.db.execute(
+            "INSERT INTO games (mode, first, second, depth, winner, moves, "
+            "move_ms, started, duration, settings) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (mode, first, second, depth, winner, bytes(moves),
+             None if move_ms is None else array("I", move_ms).tobytes(),
+             started, duration,
+             None if settings is None else json.dumps(settings))
+        )
+        game = cursor.lastrowid
+        self.db.executemany("INSERT INTO positions (key, game) VALUES (?, ?)",
+                            [(key, game) for key in position_keys(moves)])
+        if commit:
+            self.db.commit()
+        return game
+
+    # ================= QUERIES =================
+    def filters(self, mode=None, winner=None, loser=None):
+        # SQL conditions on games g; winner and loser are player names as
+        # stored in first/second ("player", "ai", "ai1", ...)
+        where, params = [], []
+        if mode is not None:
+            where.append("g.mode = ?")
+            params.append(mode)
+        if winner is not None:
+            where.append("((g.winner = 1 AND g.first = ?) OR "
+                         "(g.winner = 2 AND g.second = ?))")
+            params += [winner, winner]
+        if loser is not None:
+            where.append("((g.winner = 1 AND g.second = ?) OR "
+                         "(g.winner = 2 AND g.first = ?))")
+            params += [loser, loser]
+        return where, params
+
+    def games_through(self, board, limit=None, **filters):
+        # ids of the games that reached board (or its mirror image)
+        where, params = self.filters(**filters)
+        sql = ("SELECT p.game FROM positions p JOIN games g ON g.id = p.game "
+               "WHERE " + " AND ".join(["p.key = ?"] + where) + " ORDER BY p.game")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        key = canonical_key(board)[0]
+        return [row[0] for row in self.db.execute(sql, [key] + params)]
+
+    def outcomes(self, board, **filters):
+        # how the games through board ended, by winning piece
+        where, params = self.filters(**filters)
+        sql = ("SELECT g.winner, COUNT(*) FROM positions p "
+               "JOIN games g ON g.id = p.game "
+               "WHERE " + " AND ".join(["p.key = ?"] + where) + " GROUP BY g.winner")
+        counts = dict(self.db.execute(sql, [canonical_key(board)[0]] + params))
+        games = sum(counts.values())
+        return {
+            "games": games,
+            "wins": [counts.get(1, 0), counts.get(2, 0)],
+            "draws": counts.get(0, 0),
+        }
+
+    def game(self, game_id):
+        row = self.db.execute(
+            "SELECT id, mode, first, second, depth, winner, moves, move_ms, "
+            "started, duration, settings FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+        game = dict(zip(("id", "mode", "first", "second", "depth", "winner",
+                         "moves", "move_ms", "started", "duration",
+                         "settings"), row))
+        game["moves"] = list(game["moves"])
+        if game["move_ms"] is not None:
+            game["move_ms"] = array("I", game["move_ms"]).tolist()
+        if game["settings"] is not None:
+            game["settings"] = json.loads(game["settings"])
+        return game
+
+    def totals(self):
+        # (mode, games, piece 1 wins, piece 2 wins, draws) per mode
+        return self.db.execute(
+            "SELECT mode, COUNT(*), SUM(winner = 1), SUM(winner = 2), "
+            "SUM(winner = 0) FROM games GROUP BY mode ORDER BY mode"
+        ).fetchall()
+
+
+class GameRecorder:
+    # what a game mode needs to archive its game: the moves, and how long
+    # each one took since the previous one
+    def __init__(self):
+        self.moves = []
+        self.move_ms = []
+        self.started = time.time()
+        self.last = time.perf_counter()
+
+    def played(self, col):
+        now = time.perf_counter()
+        self.moves.append(col)
+        self.move_ms.append(round((now - self.last) * 1000))
+        self.last = now
+
+    def save(self, path, mode, first, second, winner, depth=None, settings=None):
+        # winner: piece, 0 for a draw
+        archive = GameArchive(path)
+        try:
+            return archive.record(self.moves, mode, first, second, winner,
+                                  depth, settings, self.started,
+                                  time.time() - self.started, self.move_ms)
+        finally:
+            archive.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH, metavar="PATH")
+    parser.add_argument("--moves", default=None,
+                        help="columns played from the empty board, e.g. 3342")
+    parser.add_argument("--mode", default=None)
+    parser.add_argument("--winner", default=None, metavar="NAME",
+                        help="only games NAME won (player, ai, ai1, ...)")
+    parser.add_argument("--loser", default=None, metavar="NAME",
+                        help="only games NAME lost")
+    parser.add_argument("--list", action="store_true",
+                        help="print the matching games")
+    args = parser.parse_args(argv)
+
+    archive = GameArchive(args.archive)
+    try:
+        if args.moves is None:
+            for mode, games, first, second, draws in archive.totals():
+                print(f"{mode}: {games:,} games  piece 1 wins: {first:,}  "
+                      f"piece 2 wins: {second:,}  draws: {draws:,}")
+            return
+        board = create_board()
+        for c in args.moves:
+            col = int(c)
+            drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+        filters = {"mode": args.mode, "winner": args.winner, "loser": args.loser}
+        summary = archive.outcomes(board, **filters)
+        print(f"{summary['games']:,} games through {args.moves or 'the empty board'}  "
+              f"piece 1 wins: {summary['wins'][0]:,}  "
+              f"piece 2 wins: {summary['wins'][1]:,}  draws: {summary['draws']:,}")
+        if args.list:
+            for game_id in archive.games_through(board, **filters):
+                game = archive.game(game_id)
+                print(f"game {game_id} ({game['mode']}, {game['first']} vs "
+                      f"{game['second']}, winner {game['winner']}): "
+                      + "".join(map(str, game["moves"])))
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
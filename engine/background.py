@@ -0,0 +1,47 @@
+"""Runs the AI's move on a worker thread so the pygame loop keeps running.
+
+The search is pure Python, so it shares the GIL with the game loop; the loop
+spends its frames waiting in Clock.tick(), which lets the search run nearly
+at full speed.  Searches stop with SearchCancelled soon after the cancel event
+is set: minimax checks it at every node, the solver every 1024 nodes, MCTS
+once per round of playouts and root-parallel search every CANCEL_POLL_SECONDS
+while its workers run (a worker's own move is not interrupted).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class BackgroundSearch:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.cancel = threading.Event()
+        self.future = None
+
+    def busy(self):
+        return self.future is not None
+
+    def start(self, fn, *args):
+        # fn(*args, cancel) -- give it a copy of the board, never the one
+        # being drawn
+        self.future = self.executor.submit(fn, *args, self.cancel)
+
+    def poll(self):
+        # the finished call's result, or None while it is still running
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        return future.result()
+
+    def stop(self):
+        # cancel the running call, if any, and wait for it; its result is
+        # dropped and the next call starts with a clear cancel event
+        if self.future is not None:
+            self.cancel.set()
+            wait([self.future])
+            self.future = None
+            self.cancel.clear()
+
+    def close(self):
+        # stop a running search and wait for the thread to notice
+        self.cancel.set()
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,263 @@
+"""Engine benchmarks on a fixed set of opening, midgame and endgame positions.
+
+    python -m engine.benchmark --save benchmark_baseline.json
+    python -m engine.benchmark --compare benchmark_baseline.json --fail-over 10
+
+Each case is timed a few times per position; latencies are per call, so the
+percentiles cover every position of the phase.  Peak memory is measured with
+tracemalloc in a separate, untimed run, since tracing slows Python down;
+for minimax it leaves out the transposition table, allocated up front.
+The numbers only compare on the same machine and Python.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine.bitboard import (
+    create_board, drop_piece, undo_piece, get_next_open_row,
+    get_valid_locations, winning_move
+)
+from engine.evaluation import EVALUATORS, make_evaluator, score_position
+from engine.mcts import MCTS
+from engine.ordering import MoveOrdering
+from engine.search import minimax
+from engine.stats import SearchStats
+from engine.transposition import TranspositionTable
+
+# columns played from the empty board, piece 1 first; none is decided yet
+POSITIONS = {
+    "opening": ["", "3", "33", "3324", "232334"],
+    "midgame": ["315421536562", "41565323454124", "3566514163062533",
+                "311051606264264653"],
+    "endgame": ["50061013512101621645345464",
+                "1461226560454355500104161540",
+                "242350336224411666213634231560",
+                "46615011541012413304636625552350"],
+}
+DEPTHS = (2, 4, 6)
+MCTS_ITERATIONS = 256
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmark_baseline.json"
+)
+
+
+def play_moves(moves):
+    board = create_board()
+    for c in moves:
+        col = int(c)
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+    return board
+
+
+def summarize(latencies, nodes=None):
+    ms = np.array(latencies) * 1000
+    result = {
+        "calls": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+    if nodes is not None:
+        result["nodes_per_sec"] = round(nodes / sum(latencies))
+    return result
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+# ================= CASES =================
+def bench_minimax(boards, depth, evaluator, repeat):
+    # a fresh table and ordering per search, as at the start of a game
+    latencies = []
+    nodes = 0
+
+    def search(board, tt):
+        stats = SearchStats()
+        piece = board.moves % 2 + 1
+        minimax(board, depth, -math.inf, math.inf, True, piece, tt,
+                evaluate=make_evaluator(evaluator), stats=stats,
+                ordering=MoveOrdering())
+        return stats.nodes
+
+    for board in boards:
+        for _ in range(repeat):
+            # the table is allocated outside the timing
+            tt = TranspositionTable()
+            stats = SearchStats()
+            evaluate = make_evaluator(evaluator)
+            piece = board.moves % 2 + 1
+            start = time.perf_counter()
+            minimax(board, depth, -math.inf, math.inf, True, piece, tt,
+                    evaluate=evaluate, stats=stats, ordering=MoveOrdering())
+            latencies.append(time.perf_counter() - start)
+            nodes += stats.nodes
+    result = summarize(latencies, nodes)
+    # the tables are allocated before tracing too: their fixed-size slot
+    # lists would otherwise be most of the peak, whatever the search does
+    tables = [TranspositionTable() for _ in boards]
+    result["peak_kib"] = peak_kib(
+        lambda: [search(b, tt) for b, tt in zip(boards, tables)])
+    return result
+
+
+def bench_mcts(boards, iterations, repeat):
+    # a fresh tree per search, seeded so that every run plays the same games
+    latencies = []
+    nodes = 0
+    for board in boards:
+        for _ in range(repeat):
+            tree = MCTS(seed=0)
+            stats = SearchStats()
+            start = time.perf_counter()
+            tree.best_move(board, iterations, stats=stats)
+            latencies.append(time.perf_counter() - start)
+            nodes += stats.nodes
+    result = summarize(latencies, nodes)
+    result["peak_kib"] = peak_kib(
+        lambda: [MCTS(seed=0).best_move(b, iterations) for b in boards])
+    return result
+
+
+def bench_calls(boards, make_call, repeat, number=200):
+    # make_call(board) sets up and returns the call to time; it is too quick
+    # to time once, so time `number` calls and divide
+    calls = [make_call(board) for board in boards]
+    latencies = []
+    for call in calls:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            latencies.append((time.perf_counter() - start) / number)
+    result = summarize(latencies)
+    result["peak_kib"] = peak_kib(lambda: [call() for call in calls])
+    return result
+
+
+def threat_leaf(board):
+    # what the threat evaluator costs a leaf: play a disc, score, take it back
+    evaluate = make_evaluator("threat")
+    evaluate.attach(board)
+    piece = board.moves % 2 + 1
+    col = get_valid_locations(board)[0]
+    row = get_next_open_row(board, col)
+
+    def call():
+        drop_piece(board, row, col, piece)
+        evaluate.play(row, col, piece)
+        evaluate.score(board, piece)
+        evaluate.unplay(row, col, piece)
+        undo_piece(board, row, col, piece)
+    return call
+
+
+def run(depths=DEPTHS, evaluators=EVALUATORS, repeat=3, log=print):
+    results = {}
+    for phase, sequences in POSITIONS.items():
+        boards = [play_moves(moves) for moves in sequences]
+        cases = {
+            f"score_position/{phase}": lambda: bench_calls(
+                boards, lambda b: lambda: score_position(b, 1), repeat),
+            f"threat_leaf/{phase}": lambda: bench_calls(
+                boards, threat_leaf, repeat),
+            f"winning_move/{phase}": lambda: bench_calls(
+                boards, lambda b: lambda: winning_move(b, 1), repeat),
+        }
+        for evaluator in evaluators:
+            for depth in depths:
+                cases[f"minimax/{evaluator}/d{depth}/{phase}"] = (
+                    lambda e=evaluator, d=depth: bench_minimax(boards, d, e, repeat)
+                )
+        cases[f"mcts/i{MCTS_ITERATIONS}/{phase}"] = lambda: bench_mcts(
+            boards, MCTS_ITERATIONS, repeat)
+        for name, case in cases.items():
+            results[name] = case()
+            log(format_result(name, results[name]))
+    return results
+
+
+# ================= REPORTING =================
+def format_result(name, result):
+    line = (f"{name:32} p50 {result['p50_ms']:9.3f} ms  "
+            f"p90 {result['p90_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms  "
+            f"peak {result['peak_kib']:7,} KiB")
+    if "nodes_per_sec" in result:
+        line += f"  {result['nodes_per_sec']:9,} nodes/s"
+    return line
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def compare(results, baseline):
+    # p50 change against the baseline per case; returns the worst slowdown in %
+    worst = 0.0
+    print(f"\n{'case':32} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None or not old["p50_ms"]:
+            continue
+        change = (result["p50_ms"] / old["p50_ms"] - 1) * 100
+        worst = max(worst, change)
+        print(f"{name:32} {old['p50_ms']:10.3f} {result['p50_ms']:10.3f} "
+              f"{change:+7.1f}%")
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Connect 4 engine.")
+    parser.add_argument("--depths", type=int, nargs="+", default=list(DEPTHS))
+    parser.add_argument("--eval", dest="evaluators", nargs="+",
+                        choices=EVALUATORS, default=list(EVALUATORS))
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs of every case per position")
+    parser.add_argument("--save", metavar="PATH", nargs="?",
+                        const=DEFAULT_BASELINE_PATH,
+                        help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?",
+                        const=DEFAULT_BASELINE_PATH,
+                        help="compare against a saved baseline")
+    parser.add_argument("--fail-over", type=float, metavar="PCT", default=None,
+                        help="exit with status 1 if any case's p50 is more "
+                             "than PCT%% slower than the baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.depths, args.evaluators, args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f,
+                      indent=1)
+        print(f"saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            worst = compare(results, json.load(f))
+        if args.fail_over is not None and worst > args.fail_over:
+            print(f"slower than the baseline by {worst:.1f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Bitboard representation of the Connect 4 board.
+
+Each column takes ROW_COUNT + 1 bits (the extra bit is a sentinel that keeps
+shifted lines from wrapping into the next column), so cell (row, col) is bit
+``col * H1 + row``.  A position is one mask per piece plus the column heights.
+"""
+import numpy as np
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+
+EMPTY = 0
+
+H1 = ROW_COUNT + 1
+BOTTOM_MASK = sum(1 << (c * H1) for c in range(COLUMN_COUNT))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROW_COUNT) - 1)
+COLUMN_MASKS = [((1 << ROW_COUNT) - 1) << (c * H1) for c in range(COLUMN_COUNT)]
+
+# columns from the middle out, the order searches try moves in
+CENTER_ORDER = sorted(range(COLUMN_COUNT), key=lambda c: abs(c - COLUMN_COUNT // 2))
+
+# bit index of every (row, col) cell, for unpacking masks into a grid
+CELL_SHIFTS = np.array(
+    [[c * H1 + r for c in range(COLUMN_COUNT)] for r in range(ROW_COUNT)],
+    dtype=np.uint64
+)
+ONE = np.uint64(1)
+
+# vertical, horizontal, "/" diagonal, "\" diagonal
+DIRECTIONS = (1, H1, H1 + 1, H1 - 1)
+
+
+class Bitboard:
+    __slots__ = ("masks", "heights", "moves")
+
+    def __init__(self):
+        self.masks = [0, 0]
+        self.heights = [0] * COLUMN_COUNT
+        self.moves = 0
+
+    def copy(self):
+        b = Bitboard.__new__(Bitboard)
+        b.masks = self.masks[:]
+        b.heights = self.heights[:]
+        b.moves = self.moves
+        return b
+
+    @property
+    def mask(self):
+        return self.masks[0] | self.masks[1]
+
+    def key(self):
+        # unique 49-bit key: the occupied cells plus one marker bit per column
+        return self.masks[0] + self.mask + BOTTOM_MASK
+
+
+# ================= SYMMETRY =================
+# The board is left-right symmetric: a position and its mirror image have the
+# same value, with every column c swapped for COLUMN_COUNT - 1 - c.
+COLUMN_BITS = (1 << H1) - 1
+
+
+def mirror_bits(x):
+    # swap column blocks; also valid for keys, whose per-column sums never
+    # carry into the next column
+    y = 0
+    for c in range(COLUMN_COUNT):
+        y |= ((x >> (c * H1)) & COLUMN_BITS) << ((COLUMN_COUNT - 1 - c) * H1)
+    return y
+
+
+def mirror_column(col):
+    return COLUMN_COUNT - 1 - col
+
+
+def canonical_key(board):
+    # (smaller of the key and its mirror, whether the mirror was taken);
+    # columns stored under a mirrored key must go through mirror_column
+    key = board.key()
+    mirrored = mirror_bits(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+def cell_bit(row, col):
+    return 1 << (col * H1 + row)
+
+
+def has_four(m):
+    for shift in DIRECTIONS:
+        x = m & (m >> shift)
+        if x & (x >> (2 * shift)):
+            return True
+    return False
+
+
+def winning_cells(position, mask):
+    # empty cells where a disc would complete four for `position`
+    r = (position << 1) & (position << 2) & (position << 3)
+    for s in (H1, H1 - 1, H1 + 1):
+        p = (position << s) & (position << 2 * s)
+        r |= p & (position << 3 * s)
+        r |= p & (position >> s)
+        p = (position >> s) & (position >> 2 * s)
+        r |= p & (position << s)
+        r |= p & (position >> 3 * s)
+    return r & (BOARD_MASK ^ mask)
+
+
+def popcount(m):
+    return bin(m).count("1")
+
+
+# ================= VECTORIZED =================
+# the same tests on arrays of uint64 masks, one per game
+NP_SHIFTS = [(np.uint64(s), np.uint64(2 * s), np.uint64(3 * s))
+             for s in DIRECTIONS]
+NP_BOARD = np.uint64(BOARD_MASK)
+
+
+def np_has_four(m):
+    found = np.zeros(m.shape, dtype=bool)
+    for s1, s2, _ in NP_SHIFTS:
+        x = m & (m >> s1)
+        found |= (x & (x >> s2)) != 0
+    return found
+
+
+def np_winning_cells(position, mask):
+    # winning_cells for arrays of positions; vertical lines only grow upwards
+    s1, s2, s3 = NP_SHIFTS[0]
+    r = (position << s1) & (position << s2) & (position << s3)
+    for s1, s2, s3 in NP_SHIFTS[1:]:
+        p = (position << s1) & (position << s2)
+        r |= p & (position << s3)
+        r |= p & (position >> s1)
+        p = (position >> s1) & (position >> s2)
+        r |= p & (position << s1)
+        r |= p & (position >> s3)
+    return r & (NP_BOARD ^ mask)
+
+
+# ================= BOARD FUNCTIONS =================
+def create_board():
+    return Bitboard()
+
+
+def drop_piece(board, row, col, piece):
+    board.masks[piece - 1] |= cell_bit(row, col)
+    board.heights[col] = row + 1
+    board.moves += 1
+
+
+def undo_piece(board, row, col, piece):
+    # exact inverse of drop_piece for the disc on top of col
+    board.masks[piece - 1] ^= cell_bit(row, col)
+    board.heights[col] = row
+    board.moves -= 1
+
+
+def is_valid_location(board, col):
+    return board.heights[col] < ROW_COUNT
+
+
+def get_next_open_row(board, col):
+    if board.heights[col] < ROW_COUNT:
+        return board.heights[col]
+
+
+def legal_moves_mask(board):
+    # lowest empty cell of every non-full column
+    return (board.mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def get_valid_locations(board):
+    legal = legal_moves_mask(board)
+    bottom = (1 << ROW_COUNT) - 1
+    return [c for c in range(COLUMN_COUNT) if legal >> (c * H1) & bottom]
+
+
+def winning_move(board, piece):
+    return has_four(board.masks[piece - 1])
+
+
+def last_move_wins(board, row, col, piece):
+    # only the four lines through the disc just dropped at (row, col) can
+    # have been completed; sentinel bits are never set, so walks stop at
+    # the board edge
+    m = board.masks[piece - 1]
+    pos = col * H1 + row
+    for shift in DIRECTIONS:
+        count = 1
+        p = pos + shift
+        while count < 4 and m >> p & 1:
+            count += 1
+            p += shift
+        p = pos - shift
+        while count < 4 and p >= 0 and m >> p & 1:
+            count += 1
+            p -= shift
+        if count >= 4:
+            return True
+    return False
+
+
+def is_full(board):
+    return board.moves == ROW_COUNT * COLUMN_COUNT
+
+
+def is_draw(board):
+    return is_full(board) and \
+           not winning_move(board, 1) and \
+           not winning_move(board, 2)
+
+
+def to_array(board):
+    m0 = np.uint64(board.masks[0])
+    m1 = np.uint64(board.masks[1])
+    return (((m0 >> CELL_SHIFTS) & ONE) + ((m1 >> CELL_SHIFTS) & ONE) * 2).astype(np.int8)
+
+
+def print_board(board):
+    print(np.flip(to_array(board), 0))
@@ -0,0 +1,168 @@
+"""Opening book: the best move for every position up to a number of plies.
+
+The book is built offline,
+
+    python -m engine.book --plies 6 --depth 8 --output opening_book.bin
+
+and is a header followed by fixed-size records (position key, best column,
+score) sorted by key.  Only one of each mirrored pair of positions is stored,
+under its canonical key and with the column in that orientation.  Readers
+memory-map the file and binary-search it, so only the touched pages are read
+and every process using the book shares them through the page cache.
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, get_valid_locations,
+    last_move_wins, canonical_key, mirror_column
+)
+from engine.ordering import MoveOrdering
+from engine.search import WIN_SCORE, minimax
+from engine.solver import Solver
+from engine.transposition import TranspositionTable
+
+MAGIC = b"C4BK"
+VERSION = 2
+# magic, version, method, plies, record count
+HEADER = struct.Struct("<4sBBBxI")
+# canonical_key(), best column, score for the side to move
+RECORD = struct.Struct("<Qbh")
+KEY = struct.Struct("<Q")
+
+METHOD_SEARCH = 0  # score is the minimax value, clamped to int16
+METHOD_SOLVER = 1  # score is the exact solver score
+
+DEFAULT_BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "opening_book.bin"
+)
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.method, self.plies, self.count = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+
+    @classmethod
+    def open_if_exists(cls, path=DEFAULT_BOOK_PATH):
+        return cls(path) if os.path.exists(path) else None
+
+    def close(self):
+        self.mm.close()
+
+    def lookup(self, board):
+        # (column, score) for the side to move, or None outside the book
+        if board.moves > self.plies:
+            return None
+        key, flipped = canonical_key(board)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self.mm, HEADER.size + mid * RECORD.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            found, col, score = RECORD.unpack_from(self.mm, HEADER.size + lo * RECORD.size)
+            if found == key:
+                return (mirror_column(col) if flipped else col), score
+        return None
+
+
+# ================= BUILDING =================
+def book_positions(plies):
+    # every position reachable in at most `plies` moves that is still in play
+    frontier = {canonical_key(create_board())[0]: create_board()}
+    positions = dict(frontier)
+    for _ in range(plies):
+        following = {}
+        for board in frontier.values():
+            piece = board.moves % 2 + 1
+            for col in get_valid_locations(board):
+                child = board.copy()
+                row = get_next_open_row(child, col)
+                drop_piece(child, row, col, piece)
+                if not last_move_wins(child, row, col, piece):
+                    following.setdefault(canonical_key(child)[0], child)
+        positions.update(following)
+        frontier = following
+    return list(positions.values())
+
+
+_tables = None
+_solver = None
+
+
+def _init_builder(solver_nodes):
+    global _tables, _solver
+    # one table per side: minimax scores are from the searching side's view
+    _tables = {1: TranspositionTable(), 2: TranspositionTable()}
+    _solver = Solver() if solver_nodes else None
+
+
+def best_entry(board, depth, solver_nodes=None):
+    # SolverBudgetExceeded propagates: a solved book has no heuristic entries
+    piece = board.moves % 2 + 1
+    key, flipped = canonical_key(board)
+    if solver_nodes:
+        col, score = _solver.best_move(board, solver_nodes)
+    else:
+        col, score = minimax(board, depth, -math.inf, math.inf, True, piece,
+                             _tables[piece], ordering=MoveOrdering())
+        if abs(score) == WIN_SCORE:
+            score = math.copysign(32767, score)
+        score = int(max(-32767, min(32767, score)))
+    return key, mirror_column(col) if flipped else col, score
+
+
+def _best_entry_task(args):
+    return best_entry(*args)
+
+
+def build_book(path, plies, depth=8, solver_nodes=None, workers=None):
+    # with solver_nodes every position must be solved within the budget
+    positions = book_positions(plies)
+    tasks = [(board, depth, solver_nodes) for board in positions]
+    if workers == 1:
+        _init_builder(solver_nodes)
+        entries = [best_entry(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_builder,
+                                 initargs=(solver_nodes,)) as pool:
+            entries = list(pool.map(_best_entry_task, tasks, chunksize=16))
+    entries.sort()
+
+    method = METHOD_SOLVER if solver_nodes else METHOD_SEARCH
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, method, plies, len(entries)))
+        for entry in entries:
+            f.write(RECORD.pack(*entry))
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a Connect 4 opening book.")
+    parser.add_argument("--plies", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=8,
+                        help="minimax depth used for every position")
+    parser.add_argument("--solver-nodes", type=int, default=None,
+                        help="solve every position exactly instead (node budget each)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args(argv)
+    count = build_book(args.output, args.plies, args.depth, args.solver_nodes,
+                       args.workers)
+    print(f"wrote {count} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
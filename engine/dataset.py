@@ -0,0 +1,186 @@
+"""Self-play positions written to memory-mappable .npy shards.
+
+    python -m engine.dataset data/selfplay --games 100000 --depth1 4 --depth2 4
+
+Every position of every game is one fixed-size record (RECORD): the board as
+its 49-bit key (see Bitboard.key; grids_from_keys unpacks it), the side to
+move, the column played, the mover's minimax score and the game's result for
+the mover.  Records gather in a buffer of one shard and go to disk as
+shard-00000.npy, shard-00001.npy, ... whenever it fills, so memory stays
+bounded however many games are played.  Shards are plain, uncompressed .npy
+files: ShardReader maps them with np.load(mmap_mode="r").
+"""
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from engine.bitboard import (
+    COLUMN_COUNT, H1, CELL_SHIFTS, ONE, create_board, drop_piece,
+    get_next_open_row
+)
+from engine.tournament import add_agent_arguments, agents_from_args, iter_tournament
+
+RECORD = np.dtype([
+    ("key", "<u8"),
+    ("score", "<i8"),  # NO_SCORE when minimax did not choose the move
+    ("game", "<u4"),
+    ("ply", "u1"),
+    ("to_move", "u1"),  # piece; piece 1 moves first
+    ("column", "u1"),
+    ("result", "i1"),  # for the side to move: 1 won, 0 drawn, -1 lost
+])
+NO_SCORE = np.iinfo(np.int64).min
+DEFAULT_SHARD_RECORDS = 1 << 20  # 24 MiB per shard
+SHARD_NAME = "shard-{:05d}.npy"
+
+
+def game_records(result, game):
+    # the records of one tournament result (engine.tournament.play_game)
+    moves = result["moves"]
+    last = len(moves) - 1
+    records = np.zeros(len(moves), dtype=RECORD)
+    board = create_board()
+    for ply, (col, value) in enumerate(zip(moves, result["values"])):
+        if not result["winner"]:
+            outcome = 0
+        else:
+            # the last disc played won
+            outcome = 1 if ply % 2 == last % 2 else -1
+        piece = ply % 2 + 1
+        score = NO_SCORE if value is None else int(value)
+        records[ply] = (board.key(), score, game, ply, piece, col, outcome)
+        drop_piece(board, get_next_open_row(board, col), col, piece)
+    return records
+
+
+# key bits of a column -> (disc count, piece 1's bits); the highest set bit
+# is the marker just above the top disc
+HEIGHTS = np.array([max(x.bit_length() - 1, 0) for x in range(1 << H1)],
+                   dtype=np.uint64)
+
+
+def grids_from_keys(keys):
+    # (N,) keys -> (N, ROW_COUNT, COLUMN_COUNT) int8 boards, as to_array gives
+    keys = np.asarray(keys, dtype=np.uint64)
+    first = np.zeros(keys.shape, dtype=np.uint64)
+    mask = np.zeros(keys.shape, dtype=np.uint64)
+    column_bits = np.uint64((1 << H1) - 1)
+    for c in range(COLUMN_COUNT):
+        shift = np.uint64(c * H1)
+        bits = (keys >> shift) & column_bits
+        marker = ONE << HEIGHTS[bits]
+        first |= (bits - marker) << shift
+        mask |= (marker - ONE) << shift
+    second = mask ^ first
+    return (((first[:, None, None] >> CELL_SHIFTS) & ONE)
+            + ((second[:, None, None] >> CELL_SHIFTS) & ONE) * 2).astype(np.int8)
+
+
+# ================= SHARDS =================
+class ShardWriter:
+    def __init__(self, directory, shard_records=DEFAULT_SHARD_RECORDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.buffer = np.zeros(shard_records, dtype=RECORD)
+        self.count = 0
+        # continue after the shards already there
+        self.shards = len(glob.glob(os.path.join(directory, "shard-*.npy")))
+        self.records = 0
+
+    def write(self, records):
+        while len(records):
+            take = min(len(records), len(self.buffer) - self.count)
+            self.buffer[self.count:self.count + take] = records[:take]
+            self.count += take
+            self.records += take
+            records = records[take:]
+            if self.count == len(self.buffer):
+                self.flush()
+
+    def flush(self):
+        # a shard appears only once it is complete, so readers never see
+        # half a file
+        if not self.count:
+            return
+        path = os.path.join(self.directory, SHARD_NAME.format(self.shards))
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, self.buffer[:self.count])
+        os.replace(path + ".tmp", path)
+        self.shards += 1
+        self.count = 0
+
+    def close(self):
+        self.flush()
+
+
+class ShardReader:
+    # all the shards of a directory as one sequence of records; nothing is
+    # read until it is indexed
+    def __init__(self, directory):
+        paths = sorted(glob.glob(os.path.join(directory, "shard-*.npy")))
+        self.shards = [np.load(path, mmap_mode="r") for path in paths]
+        self.ends = np.cumsum([len(shard) for shard in self.shards], dtype=np.int64)
+
+    def __len__(self):
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        s = int(np.searchsorted(self.ends, i, side="right"))
+        return self.shards[s][i - (self.ends[s] - len(self.shards[s]))]
+
+    def take(self, indices):
+        # records at any indices, in that order, e.g. a random minibatch
+        indices = np.asarray(indices, dtype=np.int64)
+        shard_of = np.searchsorted(self.ends, indices, side="right")
+        out = np.empty(len(indices), dtype=RECORD)
+        for s in np.unique(shard_of):
+            picked = shard_of == s
+            start = self.ends[s] - len(self.shards[s])
+            out[picked] = self.shards[s][indices[picked] - start]
+        return out
+
+
+def generate(directory, agent1, agent2, games, seed=0, random_plies=2,
+             workers=1, shard_records=DEFAULT_SHARD_RECORDS):
+    # plays the games and streams their positions to shards; returns the
+    # number of records written
+    writer = ShardWriter(directory, shard_records)
+    try:
+        for result in iter_tournament(agent1, agent2, games, seed,
+                                      random_plies, workers):
+            writer.write(game_records(result, result["seed"]))
+    finally:
+        writer.close()
+    return writer.records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="first game seed; also the game number in the records")
+    parser.add_argument("--random-plies", type=int, default=2,
+                        help="random opening moves played before the agents take over")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (1 plays in this process)")
+    parser.add_argument("--shard-records", type=int, default=DEFAULT_SHARD_RECORDS)
+    add_agent_arguments(parser)
+    args = parser.parse_args(argv)
+
+    agent1, agent2 = agents_from_args(args)
+    records = generate(args.directory, agent1, agent2, args.games, args.seed,
+                       args.random_plies, args.workers, args.shard_records)
+    print(f"agent 1: {agent1}")
+    print(f"agent 2: {agent2}")
+    print(f"{records:,} positions from {args.games:,} games in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
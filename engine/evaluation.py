@@ -0,0 +1,203 @@
+"""Static evaluation for the minimax leaves.
+
+"window" counts discs in every four-cell line, vectorized over one board or a
+stack of boards.  "threat" keeps those counts up to date as discs are dropped
+and taken back, so a leaf costs only the lines through the last move, and adds
+the threats that decide real games: cells that would complete four, which of
+them are playable now, and whether they sit on the owner's good rows.
+"""
+import numpy as np
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, BOTTOM_MASK, BOARD_MASK, to_array,
+    winning_cells, popcount
+)
+
+WINDOW_LENGTH = 4
+
+
+def _build_windows():
+    # flat cell indices (row * COLUMN_COUNT + col) of every four-cell line
+    windows = []
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT-3):
+            windows.append([(r, c+i) for i in range(WINDOW_LENGTH)])
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT-3):
+            windows.append([(r+i, c) for i in range(WINDOW_LENGTH)])
+    for r in range(ROW_COUNT-3):
+        for c in range(COLUMN_COUNT-3):
+            windows.append([(r+i, c+i) for i in range(WINDOW_LENGTH)])
+            windows.append([(r+3-i, c+i) for i in range(WINDOW_LENGTH)])
+    return np.array([[r * COLUMN_COUNT + c for r, c in w] for w in windows])
+
+
+def _build_window_scores():
+    # score of a window indexed by own_count * 5 + opp_count
+    table = np.zeros(25, dtype=np.int64)
+    for own in range(5):
+        for opp in range(5 - own):
+            empty = WINDOW_LENGTH - own - opp
+            score = 0
+            if own == 4:
+                score += 100
+            elif own == 3 and empty == 1:
+                score += 5
+            elif own == 2 and empty == 2:
+                score += 2
+            if opp == 3 and empty == 1:
+                score -= 4
+            table[own * 5 + opp] = score
+    return table
+
+
+WINDOWS = _build_windows()  # (69, 4)
+WINDOW_SCORES = _build_window_scores()
+CENTER_CELLS = np.arange(ROW_COUNT) * COLUMN_COUNT + COLUMN_COUNT // 2
+
+
+def score_positions(grids, piece):
+    # grids: (N, ROW_COUNT, COLUMN_COUNT) -> (N,) scores for piece
+    flat = np.asarray(grids).reshape(-1, ROW_COUNT * COLUMN_COUNT)
+    cells = flat[:, WINDOWS]
+    own = (cells == piece).sum(axis=2)
+    opp = (cells == 3 - piece).sum(axis=2)
+    score = WINDOW_SCORES[own * 5 + opp].sum(axis=1)
+    return score + (flat[:, CENTER_CELLS] == piece).sum(axis=1) * 3
+
+
+def score_position(board, piece):
+    return int(score_positions(to_array(board), piece)[0])
+
+
+# ================= THREATS =================
+def _build_cell_windows():
+    # the windows through each flat cell index
+    cell_windows = [[] for _ in range(ROW_COUNT * COLUMN_COUNT)]
+    for w, window in enumerate(WINDOWS.tolist()):
+        for cell in window:
+            cell_windows[cell].append(w)
+    return [tuple(ws) for ws in cell_windows]
+
+
+def _build_gains():
+    # change in a window's score when the mover adds a disc to it, from the
+    # mover's side and from the other side, indexed by mover * 5 + other
+    table = WINDOW_SCORES.tolist()
+    mover_gain = [0] * 25
+    other_gain = [0] * 25
+    for a in range(4):
+        for b in range(4 - a):
+            mover_gain[a * 5 + b] = table[(a + 1) * 5 + b] - table[a * 5 + b]
+            other_gain[a * 5 + b] = table[b * 5 + a + 1] - table[b * 5 + a]
+    return mover_gain, other_gain
+
+
+CELL_WINDOWS = _build_cell_windows()
+MOVER_GAIN, OTHER_GAIN = _build_gains()
+
+# zugzwang: with every other column full, the first player ends up owning
+# the odd rows (1st, 3rd, 5th from the bottom) and the second the even ones
+ODD_ROWS = BOTTOM_MASK * 0b010101
+EVEN_ROWS = BOTTOM_MASK * 0b101010
+GOOD_ROWS = (ODD_ROWS, EVEN_ROWS)  # by piece - 1; piece 1 moves first
+
+THREAT_WEIGHT = 4
+PARITY_WEIGHT = 8
+# a playable threat for the side to move (or two for the other side) is a
+# win next move; below WIN_SCORE so a real win still ranks higher
+PLAYABLE_WIN = 10**6
+
+
+class ThreatEvaluator:
+    # Follows the board being searched: minimax calls play() and unplay()
+    # around every move and score() at the leaves.  The counts are rebuilt
+    # whenever it is handed another board, or the same one at another ply.
+    incremental = True
+    __slots__ = ("board", "moves", "counts", "windows", "center")
+
+    def __init__(self):
+        self.board = None
+
+    def __reduce__(self):
+        # worker processes rebuild their own counts
+        return ThreatEvaluator, ()
+
+    def attach(self, board):
+        grid = to_array(board).reshape(-1)
+        cells = grid[WINDOWS]
+        ones = (cells == 1).sum(axis=1)
+        twos = (cells == 2).sum(axis=1)
+        self.board = board
+        self.moves = board.moves
+        self.counts = [ones.tolist(), twos.tolist()]
+        self.windows = [int(WINDOW_SCORES[ones * 5 + twos].sum()),
+                        int(WINDOW_SCORES[twos * 5 + ones].sum())]
+        self.center = [int((grid[CENTER_CELLS] == p).sum()) for p in (1, 2)]
+
+    def sync(self, board):
+        if self.board is not board or self.moves != board.moves:
+            self.attach(board)
+
+    def play(self, row, col, piece):
+        mine, theirs = self.counts[piece - 1], self.counts[2 - piece]
+        gain = loss = 0
+        for w in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+            i = mine[w] * 5 + theirs[w]
+            gain += MOVER_GAIN[i]
+            loss += OTHER_GAIN[i]
+            mine[w] += 1
+        self.windows[piece - 1] += gain
+        self.windows[2 - piece] += loss
+        if col == COLUMN_COUNT // 2:
+            self.center[piece - 1] += 1
+        self.moves += 1
+
+    def unplay(self, row, col, piece):
+        mine, theirs = self.counts[piece - 1], self.counts[2 - piece]
+        gain = loss = 0
+        for w in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+            mine[w] -= 1
+            i = mine[w] * 5 + theirs[w]
+            gain += MOVER_GAIN[i]
+            loss += OTHER_GAIN[i]
+        self.windows[piece - 1] -= gain
+        self.windows[2 - piece] -= loss
+        if col == COLUMN_COUNT // 2:
+            self.center[piece - 1] -= 1
+        self.moves -= 1
+
+    def score(self, board, piece):
+        own, opp = board.masks[piece - 1], board.masks[2 - piece]
+        mask = own | opp
+        own_threats = winning_cells(own, mask)
+        opp_threats = winning_cells(opp, mask)
+        playable = (mask + BOTTOM_MASK) & BOARD_MASK
+        if board.moves % 2 + 1 == piece:
+            if own_threats & playable:
+                return PLAYABLE_WIN
+            if popcount(opp_threats & playable) > 1:
+                return -PLAYABLE_WIN
+        else:
+            if opp_threats & playable:
+                return -PLAYABLE_WIN
+            if popcount(own_threats & playable) > 1:
+                return PLAYABLE_WIN
+        value = self.windows[piece - 1] + self.center[piece - 1] * 3
+        value += THREAT_WEIGHT * (popcount(own_threats) - popcount(opp_threats))
+        value += PARITY_WEIGHT * (popcount(own_threats & GOOD_ROWS[piece - 1])
+                                  - popcount(opp_threats & GOOD_ROWS[2 - piece]))
+        return value
+
+
+def make_evaluator(name):
+    # "window" is a stateless batch function; "threat" tracks one board, so
+    # every searcher needs its own
+    if name == "window":
+        return score_positions
+    if name == "threat":
+        return ThreatEvaluator()
+    raise ValueError(f"unknown evaluator: {name}")
+
+
+EVALUATORS = ("window", "threat")
@@ -0,0 +1,294 @@
+"""Monte Carlo tree search (UCT), an alternative to the minimax search.
+
+Each iteration walks down the tree to the child with the best upper
+confidence bound, expands the leaf it reaches and scores the new node with a
+batch of random games.  A round picks several leaves this way (counting their
+games as lost until they are played, so the next pick goes elsewhere) and
+plays all their games together on NumPy arrays of bitboards.  In those games
+a side that can win at once does; otherwise it drops a disc in a random
+column.
+
+Nodes live in parallel arrays indexed by node number, with the children of a
+node stored next to each other, so a node costs about 40 bytes.  The tree is
+kept between moves: a search starts from the subtree of the position reached
+when that position is at most two plies below the previous root.
+"""
+import math
+import time
+from array import array
+
+import numpy as np
+
+from engine.bitboard import (
+    COLUMN_COUNT, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS, CENTER_ORDER, NP_BOARD,
+    has_four, np_winning_cells
+)
+from engine.search import SearchCancelled
+
+ONGOING = 0
+WON = 1  # the side that moved into the node has four
+DRAWN = 2
+
+DEFAULT_CAPACITY = 1 << 18  # nodes, about 10 MB
+DEFAULT_BATCH = 16  # random games per leaf
+DEFAULT_LEAVES = 16  # leaves per round, played out together
+DEFAULT_ITERATIONS = 2000  # per move, when neither budget is given
+EXPLORATION = 1.4
+REUSE_PLIES = 2
+
+# ================= BATCHED PLAYOUTS =================
+NP_BOTTOM = np.uint64(BOTTOM_MASK)
+NP_COLUMNS = np.array(COLUMN_MASKS, dtype=np.uint64)
+
+
+def random_playouts(positions, masks, rng):
+    # one game from each position (positions: discs of the side to move);
+    # returns 1 where the side to move won, -1 where the other side did and
+    # 0 for a draw
+    outcome = np.zeros(len(positions), dtype=np.int8)
+    games = np.arange(len(positions))
+    pos, msk = positions, masks
+    sign = 1
+    while len(games):
+        legal = (msk + NP_BOTTOM) & NP_BOARD
+        won = (np_winning_cells(pos, msk) & legal) != 0
+        outcome[games[won]] = sign
+        # a full board has no legal cell left: a draw
+        going = ~won & (legal != 0)
+        games, pos, msk, legal = games[going], pos[going], msk[going], legal[going]
+        # no move here can win, so only the board changes hands
+        open_columns = (legal[:, None] & NP_COLUMNS) != 0
+        picks = np.where(open_columns, rng.random(open_columns.shape), -1.0)
+        move = legal & NP_COLUMNS[picks.argmax(axis=1)]
+        pos, msk = pos ^ msk, msk | move
+        sign = -sign
+    return outcome
+
+
+# ================= TREE =================
+class MCTS:
+    __slots__ = ("capacity", "batch", "leaves", "exploration", "rng", "size",
+                 "root", "positions", "masks", "parents", "firsts", "counts",
+                 "columns", "results", "visits", "values")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, batch=DEFAULT_BATCH,
+                 leaves=DEFAULT_LEAVES, exploration=EXPLORATION, seed=None):
+        self.capacity = capacity
+        self.batch = batch
+        self.leaves = leaves
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.allocate()
+        self.root = -1
+
+    def allocate(self):
+        n = self.capacity
+        self.size = 0
+        self.positions = array("Q", bytes(8 * n))  # discs of the side to move
+        self.masks = array("Q", bytes(8 * n))
+        self.parents = array("i", bytes(4 * n))
+        self.firsts = array("i", bytes(4 * n))  # first child, -1 unexpanded
+        self.counts = array("B", bytes(n))
+        self.columns = array("B", bytes(n))  # move into the node
+        self.results = array("B", bytes(n))
+        self.visits = array("I", bytes(4 * n))
+        # playout score of the side that moved into the node: 1 per win,
+        # 1/2 per draw
+        self.values = array("d", bytes(8 * n))
+
+    def add_node(self, position, mask, parent, column, result):
+        n = self.size
+        self.size += 1
+        self.positions[n] = position
+        self.masks[n] = mask
+        self.parents[n] = parent
+        self.firsts[n] = -1
+        self.counts[n] = 0
+        self.columns[n] = column
+        self.results[n] = result
+        self.visits[n] = 0
+        self.values[n] = 0.0
+        return n
+
+    def children(self, node):
+        first = self.firsts[node]
+        return range(first, first + self.counts[node]) if first >= 0 else range(0)
+
+    def expand(self, node):
+        # adds every child at once; False when the store is full
+        if self.size + COLUMN_COUNT > self.capacity:
+            return False
+        position, mask = self.positions[node], self.masks[node]
+        legal = (mask + BOTTOM_MASK) & BOARD_MASK
+        self.firsts[node] = self.size
+        for col in CENTER_ORDER:
+            move = legal & COLUMN_MASKS[col]
+            if not move:
+                continue
+            if has_four(position | move):
+                result = WON
+            elif mask | move == BOARD_MASK:
+                result = DRAWN
+            else:
+                result = ONGOING
+            self.add_node(position ^ mask, mask | move, node, col, result)
+            self.counts[node] += 1
+        return True
+
+    # ================= TREE REUSE =================
+    def find(self, position, mask):
+        # the node for the position within REUSE_PLIES of the root, or -1
+        level = [self.root] if self.root >= 0 else []
+        for _ in range(REUSE_PLIES + 1):
+            for node in level:
+                if self.masks[node] == mask and self.positions[node] == position:
+                    return node
+            level = [child for node in level for child in self.children(node)]
+        return -1
+
+    def reroot(self, node):
+        # copy the subtree under node to fresh arrays, children still side
+        # by side, and drop everything else
+        old = MCTS.__new__(MCTS)
+        for name in ("size", "positions", "masks", "firsts", "counts",
+                     "columns", "results", "visits", "values"):
+            setattr(old, name, getattr(self, name))
+        self.allocate()
+        self.root = self.copy_node(old, node, -1)
+        queue = [(node, self.root)]
+        for old_node, new_node in queue:
+            if old.firsts[old_node] < 0:
+                continue
+            self.firsts[new_node] = self.size
+            self.counts[new_node] = old.counts[old_node]
+            for child in old.children(old_node):
+                queue.append((child, self.copy_node(old, child, new_node)))
+
+    def copy_node(self, old, node, parent):
+        n = self.add_node(old.positions[node], old.masks[node], parent,
+                          old.columns[node], old.results[node])
+        self.visits[n] = old.visits[node]
+        self.values[n] = old.values[node]
+        return n
+
+    def set_root(self, board):
+        position = board.masks[board.moves % 2]
+        mask = board.mask
+        node = self.find(position, mask)
+        if node == self.root and node >= 0:
+            return
+        if node >= 0:
+            self.reroot(node)
+        else:
+            self.allocate()
+            self.root = self.add_node(position, mask, -1, 0, ONGOING)
+
+    # ================= SEARCH =================
+    def select(self):
+        # walk down by upper confidence bound; unvisited children come first
+        node = self.root
+        depth = 0
+        while self.firsts[node] >= 0 and self.results[node] == ONGOING:
+            log_n = math.log(self.visits[node])
+            best, best_score = -1, -math.inf
+            for child in self.children(node):
+                n = self.visits[child]
+                if n == 0:
+                    best = child
+                    break
+                score = (self.values[child] / n
+                         + self.exploration * math.sqrt(log_n / n))
+                if score > best_score:
+                    best, best_score = child, score
+            node = best
+            depth += 1
+        return node, depth
+
+    def descend(self):
+        # select a leaf, expanding it if it was visited before, and count its
+        # games along the path already (a virtual loss), so that the next
+        # leaves of the round are picked elsewhere
+        node, depth = self.select()
+        if self.results[node] == ONGOING and self.visits[node] and \
+                self.expand(node):
+            node = self.firsts[node]
+            depth += 1
+        n = node
+        while n >= 0:
+            self.visits[n] += self.batch
+            n = self.parents[n]
+        return node, depth
+
+    def backup(self, node, reward):
+        # reward: score of the side that moved into node over its batch
+        count = self.batch
+        while node >= 0:
+            self.values[node] += reward
+            reward = count - reward
+            node = self.parents[node]
+
+    def iterate(self, leaves):
+        # one round: `leaves` leaves scored by a single call to
+        # random_playouts; returns (playouts run, deepest leaf)
+        count = self.batch
+        picked = [self.descend() for _ in range(leaves)]
+        ongoing = [node for node, _ in picked if self.results[node] == ONGOING]
+        if ongoing:
+            positions = np.array([self.positions[n] for n in ongoing], dtype=np.uint64)
+            masks = np.array([self.masks[n] for n in ongoing], dtype=np.uint64)
+            outcome = random_playouts(np.repeat(positions, count),
+                                      np.repeat(masks, count), self.rng)
+            outcome = outcome.reshape(len(ongoing), count)
+            to_move = np.count_nonzero(outcome == 1, axis=1).tolist()
+            other = np.count_nonzero(outcome == -1, axis=1).tolist()
+            for node, t, o in zip(ongoing, to_move, other):
+                self.backup(node, o + (count - t - o) / 2)
+        for node, _ in picked:
+            if self.results[node] == WON:
+                self.backup(node, float(count))
+            elif self.results[node] == DRAWN:
+                self.backup(node, count / 2)
+        return len(ongoing) * count, max(depth for _, depth in picked)
+
+    def search(self, board, iterations=None, time_ms=None, stats=None,
+               cancel=None):
+        # grows the tree under board until a budget runs out; with neither
+        # budget it runs until cancelled or the node store is full
+        self.set_root(board)
+        deadline = time.perf_counter() + time_ms / 1000 if time_ms else None
+        done = 0
+        while True:
+            if iterations is not None and done >= iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if iterations is None and deadline is None and \
+                    self.size + COLUMN_COUNT > self.capacity:
+                break
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled
+            leaves = self.leaves
+            if iterations is not None:
+                leaves = min(leaves, iterations - done)
+            playouts, depth = self.iterate(leaves)
+            done += leaves
+            if stats is not None:
+                stats.nodes += leaves
+                stats.leaves += playouts
+                stats.depth = max(stats.depth, depth)
+        return done
+
+    def best_move(self, board, iterations=None, time_ms=None, stats=None,
+                  cancel=None):
+        # (column, share of the playouts won from it) of the most visited
+        # root move
+        if iterations is None and not time_ms:
+            iterations = DEFAULT_ITERATIONS
+        self.search(board, iterations, time_ms, stats, cancel)
+        while self.firsts[self.root] < 0:
+            self.iterate(1)
+        best = max(self.children(self.root), key=lambda c: self.visits[c])
+        return self.columns[best], self.values[best] / self.visits[best]
@@ -0,0 +1,67 @@
+"""Move ordering for alpha-beta: the earlier a refutation is tried, the
+earlier the cutoff.
+
+Killers are kept per ply (the number of discs on the board, so they stay
+valid across iterations and turns); history scores are per piece and cell.
+"""
+from engine.bitboard import COLUMN_COUNT, H1, CENTER_ORDER
+
+KILLER_SLOTS = 2
+
+
+class MoveOrdering:
+    __slots__ = ("center", "killers", "history", "tt_move", "killer_table",
+                 "history_table")
+
+    def __init__(self, center=True, killers=True, history=True, tt_move=True):
+        self.center = center
+        self.killers = killers
+        self.history = history
+        self.tt_move = tt_move
+        self.killer_table = {}
+        self.history_table = [[0] * (COLUMN_COUNT * H1) for _ in range(2)]
+
+    def order(self, board, valid_locations, tt_move, piece):
+        moves = valid_locations
+        if self.center:
+            moves = [c for c in CENTER_ORDER if c in valid_locations]
+        if self.history:
+            table = self.history_table[piece - 1]
+            heights = board.heights
+            # stable sort: ties keep the static order
+            moves = sorted(moves, key=lambda c: -table[c * H1 + heights[c]])
+        front = []
+        if self.tt_move and tt_move is not None:
+            front.append(tt_move)
+        if self.killers:
+            front += self.killer_table.get(board.moves, ())
+        if front:
+            first = []
+            for c in front:
+                if c in moves and c not in first:
+                    first.append(c)
+            moves = first + [c for c in moves if c not in first]
+        return moves
+
+    def record_cutoff(self, board, col, depth, piece):
+        if self.killers:
+            slot = self.killer_table.setdefault(board.moves, [])
+            if col not in slot:
+                slot.insert(0, col)
+                del slot[KILLER_SLOTS:]
+        if self.history:
+            self.history_table[piece - 1][col * H1 + board.heights[col]] += depth * depth
+
+
+def make_ordering(name):
+    # "none" keeps the plain left-to-right order with the table move first
+    if name == "none":
+        return None
+    if name == "center":
+        return MoveOrdering(killers=False, history=False)
+    if name == "full":
+        return MoveOrdering()
+    raise ValueError(f"unknown move ordering: {name}")
+
+
+ORDERINGS = ("none", "center", "full")
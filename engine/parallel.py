@@ -0,0 +1,121 @@
+"""Root-parallel minimax: the root moves are searched in worker processes.
+
+The first root move is searched here to get a bound, then the others are
+searched in parallel against the best score seen so far (shared through a
+multiprocessing.Value, read when a worker picks up its move).  Each move is
+searched with alpha one below that score, so ties are still resolved in root
+order and the chosen move is the one serial minimax would return.
+"""
+import math
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine.bitboard import (
+    drop_piece, undo_piece, get_next_open_row, get_valid_locations,
+    last_move_wins
+)
+from engine.evaluation import score_positions
+from engine.search import WIN_SCORE, SearchCancelled, minimax
+from engine.stats import SearchStats
+from engine.transposition import TranspositionTable
+
+# spawned, not forked: forking a process that runs pygame and a search thread
+# is not safe.  Spawned workers import the main script again, so the game
+# scripts open no window at import.
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+CANCEL_POLL_SECONDS = 0.05  # how often a cancel is noticed while workers search
+
+_shared_alpha = None
+
+
+def _init_worker(alpha):
+    global _shared_alpha
+    _shared_alpha = alpha
+
+
+def search_root_move(board, col, depth, piece, evaluate, tt_size, alpha,
+                     ordering=None, stats=None, cancel=None):
+    if stats is not None:
+        stats.children += 1
+    row = get_next_open_row(board, col)
+    drop_piece(board, row, col, piece)
+    if last_move_wins(board, row, col, piece):
+        value = WIN_SCORE
+    else:
+        _, value = minimax(board, depth - 1, alpha, math.inf, False, piece,
+                           TranspositionTable(tt_size), evaluate=evaluate,
+                           stats=stats, ordering=ordering, cancel=cancel)
+    undo_piece(board, row, col, piece)
+    return col, value
+
+
+def _worker_search(board, col, depth, piece, evaluate, tt_size, ordering):
+    # the worker's counters travel back with its result
+    stats = SearchStats()
+    col, value = search_root_move(board, col, depth, piece, evaluate, tt_size,
+                                  _shared_alpha.value - 1, ordering, stats)
+    return col, value, stats
+
+
+class RootSearchPool:
+    def __init__(self, workers=None, tt_size=1 << 18 | 1):
+        self.alpha = MP_CONTEXT.Value("d", -math.inf)
+        self.tt_size = tt_size
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=MP_CONTEXT,
+            initializer=_init_worker, initargs=(self.alpha,)
+        )
+
+    def close(self):
+        # queued moves are dropped, but the workers are waited for: left
+        # running, they race the interpreter's exit for their pipes
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parallel_minimax(board, depth, piece, pool, evaluate=score_positions,
+                     ordering=None, stats=None, cancel=None):
+    # ordering only changes which root move is tried first (and so which of
+    # equal moves wins); workers get a copy and keep their own killers
+    valid_locations = get_valid_locations(board)
+    if depth <= 1 or len(valid_locations) == 1:
+        return minimax(board, depth, -math.inf, math.inf, True, piece,
+                       evaluate=evaluate, stats=stats, ordering=ordering,
+                       cancel=cancel)
+    if ordering is not None:
+        valid_locations = ordering.order(board, valid_locations, None, piece)
+
+    if stats is not None:
+        stats.nodes += 1
+        stats.interior += 1
+        stats.depth = max(stats.depth, depth)
+    first = valid_locations[0]
+    values = {first: search_root_move(board, first, depth, piece, evaluate,
+                                      pool.tt_size, -math.inf, ordering,
+                                      stats, cancel)[1]}
+    pool.alpha.value = values[first]
+    if values[first] < WIN_SCORE:
+        pending = {pool.executor.submit(_worker_search, board, col, depth,
+                                        piece, evaluate, pool.tt_size,
+                                        ordering)
+                   for col in valid_locations[1:]}
+        while pending:
+            if cancel is not None and cancel.is_set():
+                # workers can't be interrupted; drop what they still owe
+                for f in pending:
+                    f.cancel()
+                raise SearchCancelled
+            done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                col, value, worker_stats = future.result()
+                values[col] = value
+                if stats is not None:
+                    stats.merge(worker_stats)
+                if value > pool.alpha.value:
+                    pool.alpha.value = value
+
+    # first root move with the best score, exactly as the serial loop picks
+    best = max(values.values())
+    column = next(col for col in valid_locations if values.get(col) == best)
+    return column, best
@@ -0,0 +1,101 @@
+"""One AI player: its search state and the order it tries its engines in.
+
+A move comes from the opening book when the position is in it, else from the
+exact solver when the board is full enough and it finishes within its node
+budget, else from MCTS or minimax.  The player keeps its transposition
+table, move ordering and MCTS tree from move to move; the book and the
+process pool are passed in, since a game mode may share them between players.
+"""
+import math
+import time
+
+from engine.evaluation import make_evaluator
+from engine.mcts import MCTS
+from engine.ordering import make_ordering
+from engine.parallel import parallel_minimax
+from engine.search import minimax, iterative_deepening
+from engine.solver import Solver, SolverBudgetExceeded
+from engine.stats import SearchStats, report_move
+from engine.transposition import TranspositionTable
+
+
+class Player:
+    def __init__(self, depth=5, time_ms=None, evaluator="window",
+                 ordering="full", engine="minimax", iterations=None,
+                 solver_nodes=None, solver_min_moves=0, book=None, pool=None,
+                 seed=None, report=None):
+        # time_ms, when set, replaces depth with iterative deepening and
+        # bounds MCTS; iterations is the MCTS budget otherwise
+        self.depth = depth
+        self.time_ms = time_ms
+        self.iterations = iterations
+        self.solver_nodes = solver_nodes
+        # earlier positions are not tried: the solver would rarely finish
+        # them and only delay the search that plays instead
+        self.solver_min_moves = solver_min_moves
+        self.book = book  # an OpeningBook, or None
+        self.pool = pool  # a RootSearchPool for fixed-depth searches, or None
+        self.report = report  # "print", or a file for report_move
+        self.tt = TranspositionTable()
+        self.ordering = make_ordering(ordering)
+        self.evaluate = make_evaluator(evaluator)
+        self.solver = Solver() if solver_nodes else None
+        self.mcts = MCTS(seed=seed) if engine == "mcts" else None
+        self.source = None  # what chose the last move: "book", "solver", ...
+
+    def choose_move(self, board, piece, stats=None, cancel=None):
+        # (column, value); value is the score of whichever engine chose it
+        if self.book is not None:
+            hit = self.book.lookup(board)
+            if hit is not None:
+                self.source = "book"
+                return hit
+        if self.solver is not None and board.moves >= self.solver_min_moves:
+            nodes = self.solver.nodes
+            try:
+                move = self.solver.best_move(board, self.solver_nodes, cancel)
+                self.source = "solver"
+                return move
+            except SolverBudgetExceeded:
+                pass
+            finally:
+                if stats is not None:
+                    stats.nodes += self.solver.nodes - nodes
+        if self.mcts is not None:
+            self.source = "mcts"
+            return self.mcts.best_move(board, self.iterations, self.time_ms,
+                                       stats, cancel)
+        self.source = "minimax"
+        if self.time_ms is not None:
+            return iterative_deepening(board, piece, self.time_ms, self.tt,
+                                       evaluate=self.evaluate, stats=stats,
+                                       ordering=self.ordering, cancel=cancel)
+        if self.pool is not None:
+            return parallel_minimax(board, self.depth, piece, self.pool,
+                                    evaluate=self.evaluate,
+                                    ordering=self.ordering, stats=stats,
+                                    cancel=cancel)
+        return minimax(board, self.depth, -math.inf, math.inf, True, piece,
+                       self.tt, evaluate=self.evaluate, stats=stats,
+                       ordering=self.ordering, cancel=cancel)
+
+    def timed_move(self, board, piece, cancel=None):
+        # choose_move, reporting its search stats when report is set
+        col, value, stats = self.measured_move(board, piece, cancel)
+        self.report_stats(board, piece, col, value, stats)
+        return col, value
+
+    def measured_move(self, board, piece, cancel=None):
+        # (column, value, stats); stats is None unless report is set
+        stats = SearchStats() if self.report else None
+        start = time.perf_counter()
+        col, value = self.choose_move(board, piece, stats, cancel)
+        if stats is not None:
+            stats.time = time.perf_counter() - start
+        return col, value, stats
+
+    def report_stats(self, board, piece, col, value, stats, **info):
+        # for a move found by measured_move, once it is played on board
+        if stats is not None:
+            report_move(stats, self.report, ply=board.moves, piece=piece,
+                        col=col, value=value, **info)
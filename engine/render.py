@@ -0,0 +1,123 @@
+"""pygame drawing shared by every game mode.
+
+The only engine module that needs pygame; the search and the tournament
+runner never import it.
+"""
+import numpy as np
+import pygame
+
+from engine.bitboard import ROW_COUNT, COLUMN_COUNT, to_array
+
+# ================= COLORS =================
+BLUE = (0,0,255)
+BLACK = (0,0,0)
+RED = (255,0,0)
+YELLOW = (255,255,0)
+WHITE = (255,255,255)
+
+SQUARESIZE = 100
+width = COLUMN_COUNT * SQUARESIZE
+height = (ROW_COUNT + 1) * SQUARESIZE
+RADIUS = int(SQUARESIZE/2 - 5)
+FPS = 60  # game loops tick at this rate, also while the AI is thinking
+
+
+def open_window(caption):
+    # reuse the menu's window when a mode is started from main.py
+    pygame.init()
+    screen = pygame.display.get_surface()
+    if screen is None or screen.get_size() != (width, height):
+        screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(caption)
+    return screen
+
+
+def cell_rect(row, col):
+    # screen rectangle of a board cell; row 0 is the bottom row
+    return pygame.Rect(col*SQUARESIZE, height-(row+1)*SQUARESIZE,
+                       SQUARESIZE, SQUARESIZE)
+
+
+def render_grid():
+    # the empty board: blue with black holes, drawn once per game
+    grid = pygame.Surface((width, height - SQUARESIZE))
+    grid.fill(BLUE)
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT):
+            pygame.draw.circle(grid, BLACK,
+                (int(c*SQUARESIZE+SQUARESIZE/2),
+                 int(r*SQUARESIZE+SQUARESIZE/2)), RADIUS)
+    return grid
+
+
+class BoardView:
+    # Draws only what changed since the last frame: the cells whose disc
+    # differs, and the hover disc at most once per update().  Each update
+    # pushes just those rectangles to the display.
+    def __init__(self, screen, colors):
+        self.screen = screen
+        self.colors = colors  # piece -> disc colour
+        self.grid_surface = render_grid()
+        self.shown = None  # the grid as it is on screen
+        self.hover_at = None  # (x, colour) wanted over the top row
+        self.hover_shown = None
+        self.hover_rect = None  # where the shown hover disc was drawn
+        self.dirty = []
+
+    def draw(self, board):
+        grid = to_array(board)
+        if self.shown is None:
+            # whatever was in the window before (the menus) goes too
+            self.screen.fill(BLACK)
+            self.screen.blit(self.grid_surface, (0, SQUARESIZE))
+            self.dirty.append(self.screen.get_rect())
+            changed = np.argwhere(grid != 0)
+        else:
+            changed = np.argwhere(grid != self.shown)
+        for r, c in changed.tolist():
+            rect = cell_rect(r, c)
+            # restore the empty hole from the cached grid, then the disc
+            self.screen.blit(self.grid_surface, rect,
+                             rect.move(0, -SQUARESIZE))
+            if grid[r][c] in self.colors:
+                pygame.draw.circle(self.screen, self.colors[grid[r][c]],
+                                   rect.center, RADIUS)
+            self.dirty.append(rect)
+        self.shown = grid
+        self.update()
+
+    def hover(self, x, color=None):
+        # the disc about to be dropped follows the mouse over the top row;
+        # mouse events only record where, update() draws it
+        self.hover_at = (x, color) if color is not None else None
+
+    def message(self, font, text, color, pos):
+        # written over the top row, so the hover disc goes first
+        self.hover_at = None
+        self.update()
+        label = font.render(text, True, color)
+        self.dirty.append(self.screen.blit(label, pos))
+        self.update()
+
+    def update(self):
+        if self.hover_at != self.hover_shown:
+            if self.hover_rect is not None:
+                self.dirty.append(self.screen.fill(BLACK, self.hover_rect))
+                self.hover_rect = None
+            if self.hover_at is not None:
+                x, color = self.hover_at
+                self.hover_rect = pygame.draw.circle(
+                    self.screen, color, (x, SQUARESIZE//2), RADIUS)
+                self.dirty.append(self.hover_rect)
+            self.hover_shown = self.hover_at
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+
+
+def leaves_game(event):
+    # closing the window quits; Escape goes back to the menu
+    if event.type == pygame.QUIT:
+        pygame.quit()
+        raise SystemExit
+    return event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
@@ -0,0 +1,237 @@
+"""Minimax search with alpha-beta pruning shared by both AI modes."""
+import math
+import time
+
+import numpy as np
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, drop_piece, undo_piece, get_next_open_row,
+    get_valid_locations, last_move_wins, to_array, canonical_key,
+    mirror_column
+)
+from engine.evaluation import score_positions
+from engine.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+WIN_SCORE = 10**14
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchCancelled(Exception):
+    # raised when the cancel event is set; unlike a timeout there is no
+    # answer, since the caller no longer wants one
+    pass
+
+
+def opponent(piece):
+    return 3 - piece
+
+
+# ================= MINIMAX =================
+def search_frontier(board, valid_locations, maximizingPlayer, piece,
+                    evaluate=score_positions, stats=None):
+    # every child of a depth-1 node is a leaf: score them all in one call,
+    # or one by one as each disc is played for an incremental evaluator
+    mover = piece if maximizingPlayer else opponent(piece)
+    incremental = getattr(evaluate, "incremental", False)
+    if incremental:
+        scores = []
+    else:
+        grid = to_array(board)
+        children = np.repeat(grid[np.newaxis], len(valid_locations), axis=0)
+    for i, col in enumerate(valid_locations):
+        if stats is not None:
+            stats.nodes += 1
+            stats.children += 1
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, mover)
+        won = last_move_wins(board, row, col, mover)
+        if incremental and not won:
+            evaluate.play(row, col, mover)
+            scores.append(evaluate.score(board, piece))
+            evaluate.unplay(row, col, mover)
+        undo_piece(board, row, col, mover)
+        if won:
+            return col, WIN_SCORE if maximizingPlayer else -WIN_SCORE
+        if not incremental:
+            children[i, row, col] = mover
+    if board.moves + 1 == ROW_COUNT * COLUMN_COUNT:
+        return valid_locations[0], 0
+    if stats is not None:
+        stats.leaves += len(valid_locations)
+    if incremental:
+        best = (max if maximizingPlayer else min)(range(len(scores)),
+                                                  key=scores.__getitem__)
+        return valid_locations[best], scores[best]
+    scores = evaluate(children, piece)
+    best = int(scores.argmax() if maximizingPlayer else scores.argmin())
+    return valid_locations[best], int(scores[best])
+
+
+def minimax(board, depth, alpha, beta, maximizingPlayer, piece, tt=None,
+            deadline=None, evaluate=score_positions, stats=None,
+            ordering=None, cancel=None):
+    if stats is not None:
+        stats.nodes += 1
+        if depth > stats.depth:
+            stats.depth = depth
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled
+    # wins are caught by the parent as soon as the winning disc is dropped
+    valid_locations = get_valid_locations(board)
+    if len(valid_locations) == 0:
+        return None, 0
+    tracker = evaluate if getattr(evaluate, "incremental", False) else None
+    if tracker is not None:
+        tracker.sync(board)
+    if depth == 0:
+        if stats is not None:
+            stats.leaves += 1
+        if tracker is not None:
+            return None, tracker.score(board, piece)
+        return None, int(evaluate(to_array(board), piece)[0])
+
+    alpha_orig, beta_orig = alpha, beta
+    tt_move = None
+    if tt is not None:
+        # mirrored positions share one entry; its move is stored canonical
+        key, flipped = canonical_key(board)
+        entry = tt.probe(key)
+        if entry is not None:
+            if stats is not None:
+                stats.tt_hits += 1
+            _, tt_depth, flag, tt_value, tt_move = entry
+            if flipped:
+                tt_move = mirror_column(tt_move)
+            if tt_depth >= depth:
+                if flag == EXACT:
+                    return tt_move, tt_value
+                if flag == LOWER:
+                    alpha = max(alpha, tt_value)
+                else:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_move, tt_value
+
+    mover = piece if maximizingPlayer else opponent(piece)
+    if ordering is not None:
+        valid_locations = ordering.order(board, valid_locations, tt_move, mover)
+    elif tt_move is not None:
+        # the stored best move is the most likely to cut off early
+        valid_locations.remove(tt_move)
+        valid_locations.insert(0, tt_move)
+
+    if stats is not None:
+        stats.interior += 1
+    if depth == 1:
+        column, value = search_frontier(board, valid_locations,
+                                        maximizingPlayer, piece, evaluate,
+                                        stats)
+    elif maximizingPlayer:
+        value = -math.inf
+        column = valid_locations[0]
+        for col in valid_locations:
+            if stats is not None:
+                stats.children += 1
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, piece)
+            if last_move_wins(board, row, col, piece):
+                new_score = WIN_SCORE
+            else:
+                if tracker is not None:
+                    tracker.play(row, col, piece)
+                new_score = minimax(board, depth-1, alpha, beta, False,
+                                    piece, tt, deadline, evaluate,
+                                    stats, ordering, cancel)[1]
+                if tracker is not None:
+                    tracker.unplay(row, col, piece)
+            undo_piece(board, row, col, piece)
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if ordering is not None:
+                    ordering.record_cutoff(board, col, depth, piece)
+                if stats is not None:
+                    stats.cutoff(board.moves)
+                break
+    else:
+        value = math.inf
+        column = valid_locations[0]
+        opp_piece = opponent(piece)
+        for col in valid_locations:
+            if stats is not None:
+                stats.children += 1
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, opp_piece)
+            if last_move_wins(board, row, col, opp_piece):
+                new_score = -WIN_SCORE
+            else:
+                if tracker is not None:
+                    tracker.play(row, col, opp_piece)
+                new_score = minimax(board, depth-1, alpha, beta, True,
+                                    piece, tt, deadline, evaluate,
+                                    stats, ordering, cancel)[1]
+                if tracker is not None:
+                    tracker.unplay(row, col, opp_piece)
+            undo_piece(board, row, col, opp_piece)
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if ordering is not None:
+                    ordering.record_cutoff(board, col, depth, opp_piece)
+                if stats is not None:
+                    stats.cutoff(board.moves)
+                break
+
+    if tt is not None:
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(key, depth, flag, value,
+                 mirror_column(column) if flipped else column)
+    return column, value
+
+
+def iterative_deepening(board, piece, time_limit_ms, tt=None, max_depth=None,
+                        evaluate=score_positions, stats=None, ordering=None,
+                        cancel=None):
+    # search depth 1, 2, 3, ... until the budget runs out and answer with the
+    # last completed depth; each iteration leaves its best moves in the table,
+    # so the next one searches them first
+    if tt is None:
+        tt = TranspositionTable()
+    # a timeout unwinds without undoing the moves on the way, so search on a
+    # private copy rather than the caller's board
+    board = board.copy()
+    empty = ROW_COUNT * COLUMN_COUNT - board.moves
+    if max_depth is None or max_depth > empty:
+        max_depth = empty
+    deadline = time.perf_counter() + time_limit_ms / 1000
+
+    column, value = minimax(board, 1, -math.inf, math.inf, True, piece, tt,
+                            None, evaluate, stats, ordering, cancel)
+    completed = 1
+    for depth in range(2, max_depth + 1):
+        if abs(value) == WIN_SCORE:
+            break
+        try:
+            column, value = minimax(board, depth, -math.inf, math.inf, True,
+                                    piece, tt, deadline, evaluate, stats,
+                                    ordering, cancel)
+        except SearchTimeout:
+            break
+        completed = depth
+    if stats is not None:
+        stats.depth = completed
+    return column, value
@@ -0,0 +1,173 @@
+"""Many games played in lockstep, one move in every unfinished game per step.
+
+    python -m engine.simulator --games 1000000 --policy1 random --policy2 greedy
+
+The games are bitboards held in NumPy arrays -- one uint64 mask per piece
+and game, plus the column heights -- so a step costs a fixed number of NumPy
+calls however many games there are.  Policies choose the moves:
+policy(games, idx, piece) gets the batch and the indices of the games where
+`piece` is to move, and returns a column for each of them.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, H1, CELL_SHIFTS, ONE, np_has_four
+)
+from engine.evaluation import score_positions
+
+CELLS = ROW_COUNT * COLUMN_COUNT
+DRAW = 0
+POLICIES = ("random", "greedy")
+
+
+class LockstepGames:
+    __slots__ = ("masks", "heights", "moves", "columns", "winners", "done")
+
+    def __init__(self, n):
+        self.masks = np.zeros((2, n), dtype=np.uint64)  # by piece - 1
+        self.heights = np.zeros((n, COLUMN_COUNT), dtype=np.int8)
+        self.moves = np.zeros(n, dtype=np.int8)
+        self.columns = np.full((n, CELLS), -1, dtype=np.int8)  # by ply
+        self.winners = np.zeros(n, dtype=np.int8)  # piece, or DRAW
+        self.done = np.zeros(n, dtype=bool)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def legal(self, idx):
+        # (len(idx), COLUMN_COUNT): which columns still have room
+        return self.heights[idx] < ROW_COUNT
+
+    def grids(self, idx=slice(None)):
+        # (len(idx), ROW_COUNT, COLUMN_COUNT) int8 boards, as to_array gives
+        m0 = self.masks[0, idx, None, None]
+        m1 = self.masks[1, idx, None, None]
+        return (((m0 >> CELL_SHIFTS) & ONE)
+                + ((m1 >> CELL_SHIFTS) & ONE) * 2).astype(np.int8)
+
+    def step(self, cols):
+        # cols: one column per game; finished games ignore theirs
+        live = np.flatnonzero(~self.done)
+        col = np.asarray(cols)[live]
+        row = self.heights[live, col]
+        if (row >= ROW_COUNT).any():
+            raise ValueError("move into a full column")
+        side = self.moves[live] % 2
+        ply = self.moves[live]
+        self.masks[side, live] |= ONE << (col * H1 + row).astype(np.uint64)
+        self.heights[live, col] += 1
+        self.columns[live, ply] = col
+        self.moves[live] += 1
+        won = np_has_four(self.masks[side, live])
+        self.winners[live[won]] = side[won] + 1
+        self.done[live] = won | (ply + 1 == CELLS)
+
+    def choose(self, policies):
+        # policies: (piece 1's, piece 2's)
+        cols = np.zeros(len(self), dtype=np.int64)
+        for piece, policy in ((1, policies[0]), (2, policies[1])):
+            idx = np.flatnonzero(~self.done & (self.moves % 2 == piece - 1))
+            if len(idx):
+                cols[idx] = policy(self, idx, piece)
+        return cols
+
+    def play(self, policies, plies=CELLS):
+        # at most `plies` steps; returns how many were made
+        for steps in range(plies):
+            if self.done.all():
+                return steps
+            self.step(self.choose(policies))
+        return plies
+
+
+# ================= POLICIES =================
+def random_policy(rng):
+    def policy(games, idx, piece):
+        noise = rng.random((len(idx), COLUMN_COUNT))
+        picks = np.where(games.legal(idx), noise, -1.0)
+        return picks.argmax(axis=1)
+    return policy
+
+
+def greedy_policy(evaluate=score_positions, rng=None):
+    # one ply: the column whose resulting board `evaluate` scores best for
+    # the mover; evaluate(grids, piece) scores a stack of boards at once, as
+    # score_positions does.  rng breaks ties between equal scores.
+    def policy(games, idx, piece):
+        legal = games.legal(idx)
+        children = np.repeat(games.grids(idx)[:, None], COLUMN_COUNT, axis=1)
+        game, col = np.nonzero(legal)
+        children[game, col, games.heights[idx][game, col], col] = piece
+        scores = evaluate(children.reshape(-1, ROW_COUNT, COLUMN_COUNT), piece)
+        scores = scores.reshape(len(idx), COLUMN_COUNT).astype(np.float64)
+        if rng is not None:
+            scores += rng.random(scores.shape) * 0.5
+        return np.where(legal, scores, -np.inf).argmax(axis=1)
+    return policy
+
+
+def make_policy(name, rng):
+    if name == "random":
+        return random_policy(rng)
+    if name == "greedy":
+        return greedy_policy(score_positions, rng)
+    raise ValueError(f"unknown policy: {name}")
+
+
+def simulate(games, policies, random_plies=0, rng=None, batch=100000):
+    # plays `games` games in batches of at most `batch`; yields each batch
+    # once it is finished
+    rng = np.random.default_rng() if rng is None else rng
+    opening = random_policy(rng)
+    for start in range(0, games, batch):
+        lockstep = LockstepGames(min(batch, games - start))
+        lockstep.play((opening, opening), random_plies)
+        lockstep.play(policies)
+        yield lockstep
+
+
+def summarize(batches):
+    counts = np.zeros(3, dtype=np.int64)
+    moves = 0
+    for lockstep in batches:
+        counts += np.bincount(lockstep.winners, minlength=3)
+        moves += int(lockstep.moves.sum())
+    games = int(counts.sum())
+    return {
+        "games": games,
+        "wins": [int(counts[1]), int(counts[2])],
+        "draws": int(counts[DRAW]),
+        "avg_length": moves / games if games else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=100000,
+                        help="games advanced together")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--random-plies", type=int, default=0,
+                        help="random opening moves before the policies take over")
+    parser.add_argument("--policy1", choices=POLICIES, default="random")
+    parser.add_argument("--policy2", choices=POLICIES, default="random")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    policies = (make_policy(args.policy1, rng), make_policy(args.policy2, rng))
+    start = time.perf_counter()
+    summary = summarize(simulate(args.games, policies, args.random_plies, rng,
+                                 args.batch))
+    seconds = time.perf_counter() - start
+    print(f"piece 1: {args.policy1}  piece 2: {args.policy2}")
+    print(f"games: {summary['games']:,}  piece 1 wins: {summary['wins'][0]:,}  "
+          f"piece 2 wins: {summary['wins'][1]:,}  draws: {summary['draws']:,}")
+    print(f"average game length: {summary['avg_length']:.1f} plies")
+    print(f"{summary['games'] / seconds:,.0f} games/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Exact Connect 4 solver: negamax with alpha-beta on bitboards, narrowed to
+the true score by null-window searches.
+
+Scores are from the side to move: 0 is a draw, a positive score is a win,
+and the sooner the win the larger it is -- a win with the player's k-th
+disc scores 22 - k.  Each cache slot is a 64-bit key plus one byte (an
+upper bound on the score), so the cache costs 9 bytes per position; a
+position and its mirror image share a slot.
+
+Pure Python manages on the order of 10^5 nodes per second, which is enough
+to solve mid- and endgame positions during a game; callers pass a node budget
+and fall back to the heuristic search when an early position exceeds it.
+"""
+from array import array
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, H1, BOTTOM_MASK, BOARD_MASK, COLUMN_MASKS,
+    CENTER_ORDER, get_valid_locations, mirror_bits, winning_cells, popcount
+)
+from engine.search import SearchCancelled
+
+CELLS = ROW_COUNT * COLUMN_COUNT
+MIN_SCORE = -(CELLS // 2)
+
+# prime, for the same reason as the transposition table (~38 MB)
+DEFAULT_CACHE_SIZE = 4194301
+
+
+class SolverBudgetExceeded(Exception):
+    pass
+
+
+class Solver:
+    __slots__ = ("size", "keys", "values", "nodes", "node_limit", "cancel")
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.size = cache_size
+        self.keys = array("Q", bytes(8 * cache_size))
+        self.values = bytearray(cache_size)
+        self.nodes = 0
+        self.node_limit = None
+        self.cancel = None
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        # position: discs of the side to move; it cannot win this turn
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SolverBudgetExceeded
+        if self.cancel is not None and not self.nodes & 1023 and self.cancel.is_set():
+            raise SearchCancelled
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent = position ^ mask
+        threats = winning_cells(opponent, mask)
+        forced = possible & threats
+        if forced:
+            if forced & (forced - 1):
+                # two immediate threats: cannot stop both
+                return -((CELLS - moves) // 2)
+            possible = forced
+        possible &= ~(threats >> 1)  # don't play under an opponent threat
+        if not possible:
+            return -((CELLS - moves) // 2)
+        if moves >= CELLS - 2:
+            return 0
+
+        lowest = -((CELLS - 2 - moves) // 2)
+        if alpha < lowest:
+            alpha = lowest
+            if alpha >= beta:
+                return alpha
+        highest = (CELLS - 1 - moves) // 2
+        key = position + mask
+        mirrored = mirror_bits(key)
+        if mirrored < key:
+            key = mirrored
+        i = key % self.size
+        # an unused slot has key 0, which is also the empty board's key, but
+        # value 0; stored values are at least 1
+        if self.keys[i] == key and self.values[i]:
+            highest = self.values[i] + MIN_SCORE - 1
+        if beta > highest:
+            beta = highest
+            if alpha >= beta:
+                return beta
+
+        # try moves that create the most new threats first
+        candidates = []
+        for c in CENTER_ORDER:
+            move = possible & COLUMN_MASKS[c]
+            if move:
+                after = position | move
+                candidates.append((-popcount(winning_cells(after, mask | move)), c, move))
+        candidates.sort()
+
+        child_moves = moves + 1
+        for _, _, move in candidates:
+            score = -self.negamax(opponent, mask | move, child_moves,
+                                  -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[i] = key
+        self.values[i] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def solve_position(self, position, mask, moves):
+        if winning_cells(position, mask) & (mask + BOTTOM_MASK) & BOARD_MASK:
+            return (CELLS + 1 - moves) // 2
+        lo = -((CELLS - moves) // 2)
+        hi = (CELLS + 1 - moves) // 2
+        while lo < hi:
+            # null-window probes, biased towards 0 where most scores are
+            med = lo + (hi - lo) // 2
+            if med <= 0 and lo // 2 < med:
+                med = lo // 2
+            elif med >= 0 and hi // 2 > med:
+                med = hi // 2
+            r = self.negamax(position, mask, moves, med, med + 1)
+            if r <= med:
+                hi = r
+            else:
+                lo = r
+        return lo
+
+    def solve(self, board):
+        position, mask = split(board)
+        return self.solve_position(position, mask, board.moves)
+
+    def column_scores(self, board, max_nodes=None, cancel=None):
+        # exact score of every legal column for the side to move; raises
+        # SolverBudgetExceeded after max_nodes nodes, and SearchCancelled
+        # soon after the cancel event is set
+        position, mask = split(board)
+        self.node_limit = None if max_nodes is None else self.nodes + max_nodes
+        self.cancel = cancel
+        scores = {}
+        try:
+            for col in get_valid_locations(board):
+                move = (mask + (1 << (col * H1))) & COLUMN_MASKS[col]
+                if winning_cells(position, mask) & move:
+                    scores[col] = (CELLS + 1 - board.moves) // 2
+                else:
+                    scores[col] = -self.solve_position(position ^ mask,
+                                                       mask | move,
+                                                       board.moves + 1)
+        finally:
+            self.node_limit = None
+            self.cancel = None
+        return scores
+
+    def best_move(self, board, max_nodes=None, cancel=None):
+        # the quickest win, or else the slowest loss; center first on ties
+        scores = self.column_scores(board, max_nodes, cancel)
+        col = max((c for c in CENTER_ORDER if c in scores), key=scores.get)
+        return col, scores[col]
+
+
+def split(board):
+    # (discs of the side to move, all discs); piece 1 always moves first
+    mask = board.masks[0] | board.masks[1]
+    return board.masks[board.moves % 2], mask
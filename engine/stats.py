@@ -0,0 +1,64 @@
+"""Counters collected while searching.
+
+Cutoffs are kept per ply (the number of discs on the board when the move
+failed high), the same plies the killer moves use.
+"""
+import json
+
+
+class SearchStats:
+    __slots__ = ("nodes", "leaves", "interior", "children", "cutoffs",
+                 "tt_hits", "depth", "time")
+
+    def __init__(self):
+        self.nodes = 0
+        self.leaves = 0  # static evaluations
+        self.interior = 0  # nodes whose moves were searched
+        self.children = 0  # moves searched below those nodes
+        self.cutoffs = {}
+        self.tt_hits = 0
+        self.depth = 0  # deepest search started, or last completed iteration
+        self.time = 0.0
+
+    def nodes_per_second(self):
+        return self.nodes / self.time if self.time else 0.0
+
+    def branching_factor(self):
+        # effective: the moves actually tried before a cutoff, not the legal ones
+        return self.children / self.interior if self.interior else 0.0
+
+    def cutoff(self, ply):
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+
+    def merge(self, other):
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.interior += other.interior
+        self.children += other.children
+        for ply, count in other.cutoffs.items():
+            self.cutoffs[ply] = self.cutoffs.get(ply, 0) + count
+        self.tt_hits += other.tt_hits
+        self.depth = max(self.depth, other.depth)
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "cutoffs": dict(sorted(self.cutoffs.items())),
+            "branching": round(self.branching_factor(), 2),
+            "tt_hits": self.tt_hits,
+            "depth": self.depth,
+            "time": round(self.time, 4),
+            "nps": round(self.nodes_per_second()),
+        }
+
+
+def report_move(stats, destination, **info):
+    # destination: "print" for one line on stdout, or a file to append a JSON
+    # line to; info (ply, column, ...) goes in front of the counters
+    record = dict(info, **stats.as_dict())
+    if destination == "print":
+        print(" ".join(f"{k}={v}" for k, v in record.items()))
+    else:
+        with open(destination, "a") as f:
+            f.write(json.dumps(record) + "\n")
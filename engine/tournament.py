@@ -0,0 +1,295 @@
+"""Headless AI vs AI matches, without pygame.
+
+    python -m engine.tournament --games 1000 --depth1 5 --depth2 3 --workers 16
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, create_board, drop_piece, get_next_open_row,
+    get_valid_locations, last_move_wins, is_full
+)
+from engine.archive import GameArchive
+from engine.book import OpeningBook
+from engine.evaluation import EVALUATORS
+from engine.mcts import DEFAULT_ITERATIONS
+from engine.ordering import ORDERINGS
+from engine.player import Player
+from engine.stats import SearchStats
+
+DRAW = 0
+ARCHIVE_COMMIT_GAMES = 1000  # archived games written per transaction
+ENGINES = ("minimax", "mcts")
+
+
+class Agent:
+    def __init__(self, depth=5, evaluator="window", time_ms=None, seed=None,
+                 epsilon=0.0, ordering="full", solver_nodes=None, book=None,
+                 engine="minimax", iterations=None):
+        self.depth = depth
+        self.evaluator = evaluator
+        self.time_ms = time_ms
+        self.seed = seed
+        self.epsilon = epsilon  # chance of playing a random move instead
+        self.ordering = ordering
+        # play exactly whenever the solver finishes within this many nodes
+        self.solver_nodes = solver_nodes
+        self.book = book  # opening book path
+        self.engine = engine
+        self.iterations = iterations  # MCTS budget when time_ms is not set
+
+    def __repr__(self):
+        budget = f"{self.time_ms}ms" if self.time_ms else f"depth {self.depth}"
+        search = f"{self.evaluator}, ordering={self.ordering}"
+        if self.engine == "mcts":
+            if not self.time_ms:
+                budget = f"{self.iterations or DEFAULT_ITERATIONS} iterations"
+            search = "mcts"
+        if self.solver_nodes:
+            budget = f"solver {self.solver_nodes} nodes, else {budget}"
+        if self.book:
+            budget = f"book, else {budget}"
+        return f"Agent({budget}, {search}, seed={self.seed})"
+
+    def __getstate__(self):
+        # only the configuration travels to worker processes, never a table
+        return {k: self.__dict__[k] for k in ("depth", "evaluator", "time_ms",
+                                              "seed", "epsilon", "ordering",
+                                              "solver_nodes", "book",
+                                              "engine", "iterations")}
+
+    def start_game(self, game_seed):
+        # per-game state; seeding from both seeds keeps a game reproducible
+        # no matter which process or in which order it is played
+        self.rng = random.Random(f"{self.seed}-{game_seed}")
+        self.stats = SearchStats()
+        if self.book and getattr(self, "opening_book", None) is None:
+            # mapped once per process and shared by all its games
+            self.opening_book = OpeningBook(self.book)
+        mcts_seed = self.rng.getrandbits(64) if self.engine == "mcts" else None
+        self.player = Player(depth=self.depth, time_ms=self.time_ms,
+                             evaluator=self.evaluator, ordering=self.ordering,
+                             engine=self.engine, iterations=self.iterations,
+                             solver_nodes=self.solver_nodes,
+                             book=self.opening_book if self.book else None,
+                             seed=mcts_seed)
+
+    def choose_move(self, board, piece):
+        self.value = None  # the minimax score, when minimax chose the move
+        if self.epsilon and self.rng.random() < self.epsilon:
+            return self.rng.choice(get_valid_locations(board))
+        start = time.perf_counter()
+        col, value = self.player.choose_move(board, piece, self.stats)
+        self.stats.time += time.perf_counter() - start
+        if self.player.source == "minimax":
+            self.value = value
+        return col
+
+
+def play_game(agent1, agent2, seed=0, first=0, random_plies=2):
+    # first: index of the agent that moves first and plays piece 1
+    rng = random.Random(seed)
+    agents = (agent1, agent2)
+    for agent in agents:
+        agent.start_game(seed)
+
+    board = create_board()
+    moves = []
+    values = []  # the mover's minimax score per ply, or None
+    winner = DRAW
+    while True:
+        turn = (first + board.moves) % 2
+        piece = board.moves % 2 + 1
+        if board.moves < random_plies:
+            col = rng.choice(get_valid_locations(board))
+            value = None
+        else:
+            col = agents[turn].choose_move(board, piece)
+            value = agents[turn].value
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, piece)
+        moves.append(col)
+        values.append(value)
+        if last_move_wins(board, row, col, piece):
+            winner = turn + 1
+            break
+        if is_full(board):
+            break
+
+    return {
+        "seed": seed,
+        "first": first + 1,
+        "winner": winner,
+        "moves": moves,
+        "values": values,
+        "nodes": [agent.stats.nodes for agent in agents],
+        "time": [agent.stats.time for agent in agents],
+    }
+
+
+def archive_result(archive, result, agent1, agent2):
+    # the archive names the agents by index and the winner by piece
+    first, second = ("agent1", "agent2") if result["first"] == 1 else ("agent2", "agent1")
+    winner = result["winner"]
+    if winner != DRAW:
+        winner = 1 if winner == result["first"] else 2
+    archive.record(result["moves"], "tournament", first, second, winner,
+                   settings={"agent1": repr(agent1), "agent2": repr(agent2),
+                             "seed": result["seed"]},
+                   duration=sum(result["time"]), commit=False)
+
+
+def game_seeds(games, seed=0):
+    # game i starts with agent (i % 2) so both sides open equally often
+    return ((seed + i, i % 2) for i in range(games))
+
+
+def iter_tournament(agent1, agent2, games, seed=0, random_plies=2, workers=1):
+    # yields results as games finish.  With depth or iteration budgets every
+    # game depends only on its own seed, so the set of results is the same
+    # for any worker count; a time budget searches as deep as the machine
+    # gets in time, which varies with the load and so with the worker count
+    seeds = game_seeds(games, seed)
+    if workers == 1:
+        for game_seed, first in seeds:
+            yield play_game(agent1, agent2, game_seed, first, random_plies)
+        return
+    # a few games per worker are queued at a time, so finished results never
+    # pile up however many games are played
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        try:
+            while True:
+                for game_seed, first in itertools.islice(
+                        seeds, workers * 4 - len(pending)):
+                    pending.add(pool.submit(play_game, agent1, agent2,
+                                            game_seed, first, random_plies))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def run_tournament(agent1, agent2, games, seed=0, random_plies=2, workers=1):
+    results = list(iter_tournament(agent1, agent2, games, seed, random_plies,
+                                   workers))
+    results.sort(key=lambda r: r["seed"])
+    return results
+
+
+def summarize(results):
+    games = len(results)
+    wins = sum(1 for r in results if r["winner"] == 1)
+    losses = sum(1 for r in results if r["winner"] == 2)
+    nodes = [sum(r["nodes"][i] for r in results) for i in range(2)]
+    seconds = [sum(r["time"][i] for r in results) for i in range(2)]
+    return {
+        "games": games,
+        "wins": wins,
+        "losses": losses,
+        "draws": games - wins - losses,
+        "avg_length": sum(len(r["moves"]) for r in results) / games if games else 0.0,
+        "nodes": nodes,
+        "nodes_per_second": [n / t if t else 0.0 for n, t in zip(nodes, seconds)],
+    }
+
+
+def print_result(result):
+    outcome = f"agent {result['winner']} wins" if result["winner"] else "draw"
+    print(f"game {result['seed']}: {outcome} in {len(result['moves'])} plies")
+
+
+def print_summary(summary, agent1, agent2):
+    print(f"agent 1: {agent1}")
+    print(f"agent 2: {agent2}")
+    print(f"games: {summary['games']}  "
+          f"agent 1 wins: {summary['wins']}  "
+          f"losses: {summary['losses']}  "
+          f"draws: {summary['draws']}")
+    print(f"average game length: {summary['avg_length']:.1f} plies "
+          f"(max {ROW_COUNT * COLUMN_COUNT})")
+    for i, nps in enumerate(summary["nodes_per_second"]):
+        print(f"agent {i + 1} nodes: {summary['nodes'][i]:,}  nodes/sec: {nps:,.0f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-plies", type=int, default=2,
+                        help="random opening moves played before the agents take over")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (1 plays in this process)")
+    parser.add_argument("--progress", action="store_true",
+                        help="print every game as it finishes")
+    parser.add_argument("--archive", default=None, metavar="PATH",
+                        help="save every game to this game archive")
+    add_agent_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_agent_arguments(parser):
+    for i in (1, 2):
+        parser.add_argument(f"--engine{i}", choices=ENGINES, default="minimax")
+        parser.add_argument(f"--depth{i}", type=int, default=5)
+        parser.add_argument(f"--time{i}", type=int, default=None,
+                            help="per-move budget in ms (iterative deepening, "
+                                 "or MCTS)")
+        parser.add_argument(f"--iterations{i}", type=int, default=None,
+                            help="MCTS iterations per move when there is no "
+                                 "time budget")
+        parser.add_argument(f"--eval{i}", choices=EVALUATORS, default="window")
+        parser.add_argument(f"--seed{i}", type=int, default=i)
+        parser.add_argument(f"--epsilon{i}", type=float, default=0.0)
+        parser.add_argument(f"--ordering{i}", choices=ORDERINGS, default="full")
+        parser.add_argument(f"--solver{i}", type=int, default=None, metavar="NODES",
+                            help="solve exactly when it takes at most NODES nodes")
+        parser.add_argument(f"--book{i}", default=None, metavar="PATH",
+                            help="opening book built with python -m engine.book")
+
+
+def agents_from_args(args):
+    return [Agent(depth=getattr(args, f"depth{i}"),
+                  evaluator=getattr(args, f"eval{i}"),
+                  time_ms=getattr(args, f"time{i}"),
+                  seed=getattr(args, f"seed{i}"),
+                  epsilon=getattr(args, f"epsilon{i}"),
+                  ordering=getattr(args, f"ordering{i}"),
+                  solver_nodes=getattr(args, f"solver{i}"),
+                  book=getattr(args, f"book{i}"),
+                  engine=getattr(args, f"engine{i}"),
+                  iterations=getattr(args, f"iterations{i}"))
+            for i in (1, 2)]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    agent1, agent2 = agents_from_args(args)
+    archive = GameArchive(args.archive) if args.archive else None
+    results = []
+    try:
+        for result in iter_tournament(agent1, agent2, args.games, args.seed,
+                                      args.random_plies, args.workers):
+            results.append(result)
+            if args.progress:
+                print_result(result)
+            if archive is not None:
+                archive_result(archive, result, agent1, agent2)
+                if len(results) % ARCHIVE_COMMIT_GAMES == 0:
+                    archive.commit()
+    finally:
+        if archive is not None:
+            archive.close()
+    print_summary(summarize(results), agent1, agent2)
+
+
+if __name__ == "__main__":
+    main()
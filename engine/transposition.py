@@ -0,0 +1,35 @@
+"""Fixed-size transposition table for the minimax search.
+
+Positions are keyed by canonical_key(), which is unique up to mirroring, so
+a probe only has to compare the stored key.  Values are kept from the
+searching side's point of view, so each AI keeps its own table for the whole
+game.
+"""
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# prime, so the low bits of the key (the first columns) don't pick the slot
+DEFAULT_SIZE = 1048573
+
+
+class TranspositionTable:
+    __slots__ = ("size", "slots")
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self.slots = [None] * size
+
+    def probe(self, key):
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        # depth-preferred: a shallower result never evicts a deeper one
+        i = key % self.size
+        old = self.slots[i]
+        if old is None or old[0] == key or depth >= old[1]:
+            self.slots[i] = (key, depth, flag, value, move)
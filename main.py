@@ -1,34 +1,43 @@
+import importlib
 import pygame
 import sys
-import subprocess
-import os
 
-WHITE = (255, 255, 255)
-BG_COLOR = (12, 12, 18)
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
+# the board window's size (engine.render); the modes, and with them NumPy and
+# the engine, are only imported once one is chosen
 SQUARESIZE = 100
-width = COLUMN_COUNT * SQUARESIZE
-height = (ROW_COUNT + 1) * SQUARESIZE
+width = 7 * SQUARESIZE
+height = (6 + 1) * SQUARESIZE
 
-pygame.init()
-screen = pygame.display.set_mode((width, height))
-pygame.display.set_caption("Connect 4 Menu")
+WHITE = (255, 255, 255)
+BG_COLOR = (12, 12, 18)
+GOLD = (255, 215, 0)
+CLOWN_RED = (255, 80, 80)
+BTN_COLOR = (40, 70, 140)
+BTN_HOVER = (90, 150, 255)
 
-font_title = pygame.font.SysFont("arialblack", 60)
-font_btn = pygame.font.SysFont("arial", 34)
-font_small = pygame.font.SysFont("arial", 22)
+PULSE_FRAMES = 44  # the titles bob up and back down once per 44 frames
+FRAME_MS = 1000 / 60
+ANIMATION_MS = 4 * FRAME_MS  # the bob moves a pixel at most every 4 frames
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+def title_offset(ms):
+    # how far the glow is raised above its title, ms into the menu
+    frame = int(ms / FRAME_MS) % PULSE_FRAMES
+    pulse = frame if frame <= PULSE_FRAMES // 2 else PULSE_FRAMES - frame
+    return (pulse - 1) // 4
 
 def game_mode_menu():
-    clock = pygame.time.Clock()
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("Connect 4 Menu")
+
+    font_title = pygame.font.SysFont("arialblack", 60)
+    font_btn = pygame.font.SysFont("arial", 34)
+    font_small = pygame.font.SysFont("arial", 22)
 
     buttons = [
-        {"text": "PLAYER vs PLAYER", "file": "connect4.py"},
-        {"text": "PLAYER vs AI", "file": "connect4_with_ai.py"},
-        {"text": "AI vs AI", "file": "connect4_ai_vs_ai.py"}
+        {"text": "PLAYER vs PLAYER", "mode": "connect4"},
+        {"text": "PLAYER vs AI", "mode": "connect4_with_ai"},
+        {"text": "AI vs AI", "mode": "connect4_ai_vs_ai"}
     ]
 
     rects = [
@@ -36,70 +45,95 @@ def game_mode_menu():
         for i in range(len(buttons))
     ]
 
-    pulse = 0
-    direction = 1
-    game_process = None
-
-    while True:
-        clock.tick(60)
-        screen.fill(BG_COLOR)
-
-        if game_process and game_process.poll() is not None:
-            game_process = None
-
-        # ===== Title Animation =====
-        pulse += direction
-        if pulse > 20 or pulse < 0:
-            direction *= -1
-
-        # ===== CONNECT 4 =====
-        title = font_title.render("CONNECT 4", True, (255, 215, 0))
-        glow = font_title.render("CONNECT 4", True, (255, 215, 0))
-        screen.blit(glow, (width//2 - glow.get_width()//2 - 2, 75 - pulse//4))
-        screen.blit(title, (width//2 - title.get_width()//2, 75))
-
-        # ===== CLOWNS 🤡 (same effect) =====
-        clown_title = font_title.render("Clowns", True, (255, 80, 80))
-        clown_glow = font_title.render("Clowns", True, (255, 80, 80))
-        screen.blit(clown_glow, (width//2 - clown_glow.get_width()//2 - 2, 135 - pulse//4))
-        screen.blit(clown_title, (width//2 - clown_title.get_width()//2, 135))
-
-                # ===== Subtitle =====
-        subtitle = font_btn.render("Adversarial Search Game", True, (180, 180, 180))
+    # ===== Cached Surfaces =====
+    # the glow is the title itself, drawn again a little higher
+    titles = [
+        (font_title.render("CONNECT 4", True, GOLD), 75),
+        (font_title.render("Clowns", True, CLOWN_RED), 135),
+    ]
+    subtitle = font_btn.render("Adversarial Search Game", True, (180, 180, 180))
+    # the titles reach into the subtitle, so it is redrawn with them
+    title_area = pygame.Rect(0, 60, width, 270 - 60)
+    footer = font_small.render("Minimax • Alpha-Beta • AI Project", True, (120, 120, 120))
+    labels = [font_btn.render(btn["text"], True, WHITE) for btn in buttons]
+
+    def draw_titles(offset):
+        screen.fill(BG_COLOR, title_area)
+        for title, y in titles:
+            x = width//2 - title.get_width()//2
+            screen.blit(title, (x - 2, y - offset))
+            screen.blit(title, (x, y))
         screen.blit(subtitle, (width//2 - subtitle.get_width()//2, 210))
-
-        footer = font_small.render("Minimax • Alpha-Beta • AI Project", True, (120, 120, 120))
+        return title_area
+
+    def draw_button(i, hovered):
+        color = BTN_HOVER if hovered else BTN_COLOR
+        pygame.draw.rect(screen, BG_COLOR, rects[i])
+        pygame.draw.rect(screen, color, rects[i], border_radius=18)
+        pygame.draw.rect(screen, WHITE, rects[i], 2, border_radius=18)
+        screen.blit(labels[i], labels[i].get_rect(center=rects[i].center))
+        return rects[i]
+
+    def hovered_button(pos):
+        for i, rect in enumerate(rects):
+            if rect.collidepoint(pos):
+                return i
+        return None
+
+    def draw_menu():
+        screen.fill(BG_COLOR)
+        draw_titles(offset)
         screen.blit(footer, (width//2 - footer.get_width()//2, height - 40))
+        for i in range(len(buttons)):
+            draw_button(i, i == hovered)
+        pygame.display.update()
 
-        mouse_pos = pygame.mouse.get_pos()
-        for i, btn in enumerate(buttons):
-            color = (90, 150, 255) if rects[i].collidepoint(mouse_pos) else (40, 70, 140)
-            pygame.draw.rect(screen, color, rects[i], border_radius=18)
-            pygame.draw.rect(screen, WHITE, rects[i], 2, border_radius=18)
-
-            label = font_btn.render(btn["text"], True, WHITE)
-            screen.blit(
-                label,
-                (rects[i].centerx - label.get_width() // 2,
-                 rects[i].centery - label.get_height() // 2)
-            )
+    start = pygame.time.get_ticks()
+    offset = title_offset(0)
+    hovered = hovered_button(pygame.mouse.get_pos())
+    draw_menu()
 
-        pygame.display.update()
+    while True:
+        # ===== Sleep Until An Event Or The Next Animation Step =====
+        elapsed = pygame.time.get_ticks() - start
+        timeout = int(ANIMATION_MS - elapsed % ANIMATION_MS) + 1
+        events = [pygame.event.wait(timeout)] + pygame.event.get()
+        dirty = []
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                if game_process:
-                    game_process.terminate()
                 pygame.quit()
                 sys.exit()
 
+            if event.type == pygame.MOUSEMOTION:
+                now_hovered = hovered_button(event.pos)
+                if now_hovered != hovered:
+                    for i in (hovered, now_hovered):
+                        if i is not None:
+                            dirty.append(draw_button(i, i == now_hovered))
+                    hovered = now_hovered
+
             if event.type == pygame.MOUSEBUTTONDOWN:
-                for i, btn in enumerate(buttons):
-                    if rects[i].collidepoint(event.pos):
-                        if game_process is None:
-                            file_path = os.path.join(BASE_DIR, btn["file"])
-                            game_process = subprocess.Popen(
-                                [sys.executable, file_path]
-                            )
-
-game_mode_menu()
+                i = hovered_button(event.pos)
+                if i is not None:
+                    # the mode runs in this window until the game ends
+                    # or Escape is pressed
+                    importlib.import_module(buttons[i]["mode"]).main()
+                    pygame.display.set_caption("Connect 4 Menu")
+                    pygame.event.clear()
+                    hovered = hovered_button(pygame.mouse.get_pos())
+                    draw_menu()
+                    dirty = []
+                    break
+
+        # ===== Title Animation =====
+        now_offset = title_offset(pygame.time.get_ticks() - start)
+        if now_offset != offset:
+            offset = now_offset
+            dirty.append(draw_titles(offset))
+
+        if dirty:
+            pygame.display.update(dirty)
+
+if __name__ == "__main__":
+    game_mode_menu()
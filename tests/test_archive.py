@@ -0,0 +1,100 @@
+import random
+
+from engine.archive import GameArchive, GameRecorder, position_keys
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, get_valid_locations,
+    last_move_wins, is_full, canonical_key, mirror_column
+)
+
+
+def random_game(rng):
+    # (moves, winning piece or 0)
+    board = create_board()
+    moves = []
+    while True:
+        col = rng.choice(get_valid_locations(board))
+        row = get_next_open_row(board, col)
+        piece = board.moves % 2 + 1
+        drop_piece(board, row, col, piece)
+        moves.append(col)
+        if last_move_wins(board, row, col, piece):
+            return moves, piece
+        if is_full(board):
+            return moves, 0
+
+
+def replay(moves):
+    # every board of the game, from the empty one on
+    board = create_board()
+    boards = [board.copy()]
+    for col in moves:
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+        boards.append(board.copy())
+    return boards
+
+
+def loser(winner, first, second):
+    if winner == 1:
+        return second
+    if winner == 2:
+        return first
+    return None
+
+
+def test_archive_answers_as_a_replay_does(tmp_path):
+    rng = random.Random(0)
+    archive = GameArchive(str(tmp_path / "games.sqlite"))
+    games = {}
+    for i in range(60):
+        moves, winner = random_game(rng)
+        first, second = ("ai1", "ai2") if i % 2 else ("ai2", "ai1")
+        game = archive.record(moves, "aivai", first, second, winner, depth=3,
+                              settings={"i": i}, commit=False)
+        games[game] = (moves, winner, first, second)
+    archive.commit()
+
+    # the positions of a few games, and the games that went through them by
+    # replaying every game
+    for moves, _, _, _ in list(games.values())[:10]:
+        for board in replay(moves)[:12]:
+            key = canonical_key(board)[0]
+            through = sorted(g for g, (m, _, _, _) in games.items()
+                             if key in {canonical_key(b)[0] for b in replay(m)})
+            assert archive.games_through(board) == through
+            winners = [games[g][1] for g in through]
+            assert archive.outcomes(board) == {
+                "games": len(through),
+                "wins": [winners.count(1), winners.count(2)],
+                "draws": winners.count(0),
+            }
+            assert archive.games_through(board, loser="ai1") == [
+                g for g in through if loser(*games[g][1:]) == "ai1"
+            ]
+
+    for game, (moves, winner, first, second) in games.items():
+        stored = archive.game(game)
+        assert stored["moves"] == moves
+        assert (stored["winner"], stored["first"], stored["second"]) == (winner, first, second)
+    archive.close()
+
+
+def test_mirror_image_games_share_positions():
+    moves, _ = random_game(random.Random(1))
+    mirrored = [mirror_column(col) for col in moves]
+    assert position_keys(moves) == position_keys(mirrored)
+    assert position_keys(moves) == [canonical_key(b)[0] for b in replay(moves)]
+
+
+def test_recorder_saves_a_game(tmp_path):
+    path = str(tmp_path / "games.sqlite")
+    recorder = GameRecorder()
+    for col in (3, 3, 4, 4, 5, 5, 6):
+        recorder.played(col)
+    game = recorder.save(path, "pvai", "player", "ai", 1, 5, {"engine": "minimax"})
+    archive = GameArchive(path)
+    stored = archive.game(game)
+    archive.close()
+    assert stored["moves"] == [3, 3, 4, 4, 5, 5, 6]
+    assert len(stored["move_ms"]) == 7
+    assert stored["settings"] == {"engine": "minimax"}
+    assert stored["depth"] == 5
@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, create_board, drop_piece, undo_piece,
+    get_next_open_row, get_valid_locations, winning_move, last_move_wins,
+    is_full, is_draw, to_array, canonical_key, mirror_column
+)
+
+
+# the plain list-of-rows board the game modes used before the bitboard
+def array_winning_move(grid, piece):
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(ROW_COUNT):
+            if all(grid[r][c + i] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT - 3):
+            if all(grid[r + i][c] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(ROW_COUNT - 3):
+            if all(grid[r + i][c + i] == piece for i in range(4)):
+                return True
+    for c in range(COLUMN_COUNT - 3):
+        for r in range(3, ROW_COUNT):
+            if all(grid[r - i][c + i] == piece for i in range(4)):
+                return True
+    return False
+
+
+def array_open_row(grid, col):
+    for r in range(ROW_COUNT):
+        if grid[r][col] == 0:
+            return r
+    return None
+
+
+def random_games(count, seed=0):
+    # each game as the moves played until a win or a full board
+    rng = random.Random(seed)
+    for _ in range(count):
+        grid = [[0] * COLUMN_COUNT for _ in range(ROW_COUNT)]
+        moves = []
+        piece = 1
+        while True:
+            col = rng.choice([c for c in range(COLUMN_COUNT)
+                              if array_open_row(grid, c) is not None])
+            grid[array_open_row(grid, col)][col] = piece
+            moves.append(col)
+            if array_winning_move(grid, piece) or len(moves) == ROW_COUNT * COLUMN_COUNT:
+                break
+            piece = 3 - piece
+        yield moves
+
+
+def test_bitboard_matches_array_board():
+    for moves in random_games(300):
+        board = create_board()
+        grid = [[0] * COLUMN_COUNT for _ in range(ROW_COUNT)]
+        for ply, col in enumerate(moves):
+            piece = ply % 2 + 1
+            assert get_valid_locations(board) == [
+                c for c in range(COLUMN_COUNT) if array_open_row(grid, c) is not None
+            ]
+            row = get_next_open_row(board, col)
+            assert row == array_open_row(grid, col)
+            drop_piece(board, row, col, piece)
+            grid[row][col] = piece
+            assert np.array_equal(to_array(board), np.array(grid))
+            won = array_winning_move(grid, piece)
+            assert last_move_wins(board, row, col, piece) == won
+            assert winning_move(board, piece) == won
+            assert not winning_move(board, 3 - piece)
+            assert is_full(board) == (ply + 1 == ROW_COUNT * COLUMN_COUNT)
+            assert is_draw(board) == (is_full(board) and not won)
+
+
+def test_undo_piece_restores_the_board():
+    for moves in random_games(50, seed=1):
+        board = create_board()
+        history = []
+        for ply, col in enumerate(moves):
+            history.append((board.copy(), get_next_open_row(board, col), col, ply % 2 + 1))
+            drop_piece(board, history[-1][1], col, ply % 2 + 1)
+        for before, row, col, piece in reversed(history):
+            undo_piece(board, row, col, piece)
+            assert board.masks == before.masks
+            assert board.heights == before.heights
+            assert board.moves == before.moves
+
+
+def test_canonical_key_is_shared_with_the_mirror_image():
+    for moves in random_games(50, seed=2):
+        board = create_board()
+        mirrored = create_board()
+        for ply, col in enumerate(moves):
+            drop_piece(board, get_next_open_row(board, col), col, ply % 2 + 1)
+            m = mirror_column(col)
+            drop_piece(mirrored, get_next_open_row(mirrored, m), m, ply % 2 + 1)
+            assert canonical_key(board)[0] == canonical_key(mirrored)[0]
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, get_valid_locations,
+    to_array, canonical_key, mirror_column
+)
+from engine.book import OpeningBook, book_positions, build_book
+from engine.search import WIN_SCORE, minimax
+
+PLIES = 2
+DEPTH = 3
+
+
+@pytest.fixture(scope="module")
+def book(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("book") / "book.bin")
+    build_book(path, PLIES, DEPTH, workers=1)
+    book = OpeningBook(path)
+    yield book
+    book.close()
+
+
+def test_book_holds_the_search_result_for_every_position(book):
+    positions = book_positions(PLIES)
+    assert book.count == len(positions)
+    for board in positions:
+        col, score = book.lookup(board)
+        assert col in get_valid_locations(board)
+        _, value = minimax(board, DEPTH, -math.inf, math.inf, True,
+                           board.moves % 2 + 1)
+        if abs(value) == WIN_SCORE:
+            value = math.copysign(32767, value)
+        assert score == int(max(-32767, min(32767, value)))
+
+
+def test_positions_past_the_book_are_not_found(book):
+    board = create_board()
+    for col in (3, 3, 2):
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+    assert book.lookup(board) is None
+
+
+def mirror(board):
+    # the board with every column c swapped for mirror_column(c)
+    mirrored = create_board()
+    for row, cells in enumerate(to_array(board).tolist()):
+        for col, piece in enumerate(cells):
+            if piece:
+                drop_piece(mirrored, row, mirror_column(col), piece)
+    return mirrored
+
+
+def test_one_record_serves_both_mirror_images(book):
+    positions = book_positions(PLIES)
+    # up to symmetry: the empty board, 4 one-disc and 25 two-disc positions
+    assert len(positions) == 1 + 4 + 25
+    assert len({canonical_key(board)[0] for board in positions}) == len(positions)
+    for board in positions:
+        col, score = book.lookup(board)
+        assert book.lookup(mirror(board)) == (mirror_column(col), score)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from engine.bitboard import create_board, drop_piece, get_next_open_row, to_array
+from engine.dataset import NO_SCORE, ShardReader, generate, grids_from_keys
+from engine.tournament import Agent, run_tournament
+
+GAMES = 12
+
+
+def test_shards_match_a_replay_of_the_games(tmp_path):
+    agent1, agent2 = Agent(depth=2, seed=1), Agent(depth=1, seed=2, epsilon=0.1)
+    records = generate(str(tmp_path), agent1, agent2, GAMES, seed=3,
+                       workers=1, shard_records=50)
+    reader = ShardReader(str(tmp_path))
+    assert len(reader) == records
+    assert len(reader.shards) == -(-records // 50)
+
+    i = 0
+    for result in run_tournament(agent1, agent2, GAMES, seed=3):
+        board = create_board()
+        for ply, (col, value) in enumerate(zip(result["moves"], result["values"])):
+            record = reader[i]
+            piece = ply % 2 + 1
+            if result["winner"] == 0:
+                outcome = 0
+            else:
+                # the winner made the last move
+                outcome = 1 if ply % 2 == (len(result["moves"]) - 1) % 2 else -1
+            assert (record["game"], record["ply"]) == (result["seed"], ply)
+            assert record["key"] == board.key()
+            assert np.array_equal(grids_from_keys([record["key"]])[0], to_array(board))
+            assert (record["to_move"], record["column"]) == (piece, col)
+            assert record["result"] == outcome
+            assert record["score"] == (NO_SCORE if value is None else value)
+            drop_piece(board, get_next_open_row(board, col), col, piece)
+            i += 1
+    assert i == records
+
+    indices = np.random.default_rng(0).permutation(records)[:100]
+    taken = reader.take(indices)
+    assert all(taken[j] == reader[int(k)] for j, k in enumerate(indices))
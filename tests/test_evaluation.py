@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+
+from engine.bitboard import (
+    ROW_COUNT, COLUMN_COUNT, create_board, drop_piece, undo_piece,
+    get_next_open_row, get_valid_locations, last_move_wins, is_full, to_array
+)
+from engine.evaluation import ThreatEvaluator, score_positions, score_position
+
+
+# the per-window scoring the search used before it was vectorized
+def window_score(window, piece):
+    score = 0
+    if window.count(piece) == 4:
+        score += 100
+    elif window.count(piece) == 3 and window.count(0) == 1:
+        score += 5
+    elif window.count(piece) == 2 and window.count(0) == 2:
+        score += 2
+    if window.count(3 - piece) == 3 and window.count(0) == 1:
+        score -= 4
+    return score
+
+
+def reference_score(grid, piece):
+    score = [grid[r][COLUMN_COUNT // 2] for r in range(ROW_COUNT)].count(piece) * 3
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT - 3):
+            score += window_score(grid[r][c:c + 4], piece)
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT - 3):
+            score += window_score([grid[r + i][c] for i in range(4)], piece)
+    for r in range(ROW_COUNT - 3):
+        for c in range(COLUMN_COUNT - 3):
+            score += window_score([grid[r + i][c + i] for i in range(4)], piece)
+            score += window_score([grid[r + 3 - i][c + i] for i in range(4)], piece)
+    return score
+
+
+def random_boards(count, seed=0):
+    # every board of a few random games, wins and full boards included
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = create_board()
+        while True:
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            piece = board.moves % 2 + 1
+            drop_piece(board, row, col, piece)
+            boards.append(board.copy())
+            if last_move_wins(board, row, col, piece) or is_full(board):
+                break
+    return boards
+
+
+def test_score_positions_matches_per_window_scoring():
+    boards = random_boards(300)
+    grids = np.array([to_array(board) for board in boards])
+    for piece in (1, 2):
+        expected = [reference_score(grid.tolist(), piece) for grid in grids]
+        assert score_positions(grids, piece).tolist() == expected
+        assert [score_position(board, piece) for board in boards] == expected
+
+
+def assert_same_counts(evaluator, board):
+    fresh = ThreatEvaluator()
+    fresh.attach(board)
+    assert evaluator.counts == fresh.counts
+    assert evaluator.windows == fresh.windows
+    assert evaluator.center == fresh.center
+    for piece in (1, 2):
+        assert evaluator.score(board, piece) == fresh.score(board, piece)
+
+
+def test_threat_evaluator_play_and_unplay_match_a_fresh_attach():
+    rng = random.Random(1)
+    for _ in range(30):
+        board = create_board()
+        evaluator = ThreatEvaluator()
+        evaluator.attach(board)
+        played = []
+        while True:
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            piece = board.moves % 2 + 1
+            drop_piece(board, row, col, piece)
+            evaluator.play(row, col, piece)
+            played.append((row, col, piece))
+            assert_same_counts(evaluator, board)
+            if last_move_wins(board, row, col, piece) or is_full(board):
+                break
+        for row, col, piece in reversed(played):
+            undo_piece(board, row, col, piece)
+            evaluator.unplay(row, col, piece)
+            assert_same_counts(evaluator, board)
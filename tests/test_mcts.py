@@ -0,0 +1,56 @@
+import numpy as np
+
+from engine.bitboard import create_board, drop_piece, get_next_open_row
+from engine.mcts import MCTS, random_playouts
+
+
+def play(moves):
+    board = create_board()
+    for col in moves:
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+    return board
+
+
+def test_playouts_take_a_win_in_one():
+    # piece 1 has three in column 0 and moves: every game is won at once
+    board = play((0, 6, 0, 6, 0, 5))
+    positions = np.full(50, board.masks[0], dtype=np.uint64)
+    masks = np.full(50, board.mask, dtype=np.uint64)
+    outcome = random_playouts(positions, masks, np.random.default_rng(0))
+    assert outcome.tolist() == [1] * 50
+
+
+def test_playouts_end_every_game():
+    board = create_board()
+    positions = np.zeros(200, dtype=np.uint64)
+    masks = np.full(200, board.mask, dtype=np.uint64)
+    outcome = random_playouts(positions, masks, np.random.default_rng(1))
+    assert set(outcome.tolist()) <= {-1, 0, 1}
+    # the side to move first wins more often than not at random
+    assert np.count_nonzero(outcome == 1) > np.count_nonzero(outcome == -1)
+
+
+def test_best_move_wins_and_blocks():
+    assert MCTS(seed=0).best_move(play((0, 6, 0, 6, 0, 5)), 500)[0] == 0
+    # piece 2 to move must stop three in column 0
+    assert MCTS(seed=0).best_move(play((0, 6, 0, 6, 0)), 2000)[0] == 0
+
+
+def test_same_seed_same_search():
+    board = play((3, 3, 2))
+    first, second = MCTS(seed=7), MCTS(seed=7)
+    assert first.best_move(board, 300) == second.best_move(board, 300)
+    assert first.visits[:first.size] == second.visits[:second.size]
+
+
+def test_tree_is_kept_two_plies_down():
+    mcts = MCTS(seed=0)
+    board = play((3,))
+    mcts.best_move(board, 2000)
+    child = next(c for c in mcts.children(mcts.root) if mcts.columns[c] == 3)
+    grandchild = next(c for c in mcts.children(child) if mcts.columns[c] == 2)
+    visits, value = mcts.visits[grandchild], mcts.values[grandchild]
+    assert visits > 0
+    mcts.set_root(play((3, 3, 2)))
+    assert (mcts.visits[mcts.root], mcts.values[mcts.root]) == (visits, value)
+    assert mcts.parents[mcts.root] == -1
@@ -0,0 +1,50 @@
+import math
+import random
+
+import pytest
+
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, get_valid_locations,
+    last_move_wins
+)
+from engine.ordering import make_ordering
+from engine.parallel import RootSearchPool, parallel_minimax
+from engine.search import minimax
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = RootSearchPool(2)
+    yield pool
+    pool.close()
+
+
+def positions(count, seed=0):
+    rng = random.Random(seed)
+    boards = [create_board()]
+    while len(boards) < count:
+        board = create_board()
+        for _ in range(rng.randrange(1, 12)):
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            piece = board.moves % 2 + 1
+            drop_piece(board, row, col, piece)
+            if last_move_wins(board, row, col, piece):
+                break
+        else:
+            boards.append(board)
+    return boards
+
+
+@pytest.mark.parametrize("ordering", ["none", "center", "full"])
+@pytest.mark.parametrize("depth", [2, 3, 4])
+def test_parallel_minimax_matches_serial(pool, depth, ordering):
+    # the same column, not just the same value: ties go to the first root
+    # move in both
+    for board in positions(8):
+        piece = board.moves % 2 + 1
+        serial = minimax(board.copy(), depth, -math.inf, math.inf, True, piece,
+                         ordering=make_ordering(ordering))
+        parallel = parallel_minimax(board.copy(), depth, piece, pool,
+                                    ordering=make_ordering(ordering))
+        assert parallel == serial
@@ -0,0 +1,93 @@
+import math
+import random
+
+import pytest
+
+from engine.bitboard import (
+    create_board, drop_piece, undo_piece, get_next_open_row,
+    get_valid_locations, last_move_wins, is_full
+)
+from engine.evaluation import score_position
+from engine.ordering import make_ordering
+from engine.search import WIN_SCORE, minimax, iterative_deepening
+from engine.transposition import TranspositionTable
+
+
+def naive_minimax(board, depth, maximizing, piece):
+    # every move searched, no pruning, no table: the values minimax must give
+    valid_locations = get_valid_locations(board)
+    if not valid_locations:
+        return 0
+    if depth == 0:
+        return score_position(board, piece)
+    mover = piece if maximizing else 3 - piece
+    values = []
+    for col in valid_locations:
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, mover)
+        if last_move_wins(board, row, col, mover):
+            values.append(WIN_SCORE if maximizing else -WIN_SCORE)
+        else:
+            values.append(naive_minimax(board, depth - 1, not maximizing, piece))
+        undo_piece(board, row, col, mover)
+    return max(values) if maximizing else min(values)
+
+
+def child_value(board, col, depth, piece):
+    # what naive_minimax gives the move col for piece, to move on board
+    board = board.copy()
+    row = get_next_open_row(board, col)
+    drop_piece(board, row, col, piece)
+    if last_move_wins(board, row, col, piece):
+        return WIN_SCORE
+    return naive_minimax(board, depth - 1, False, piece)
+
+
+def random_positions(count, seed=0):
+    # positions still in play after a few random moves
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board()
+        for _ in range(rng.randrange(2, 16)):
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            piece = board.moves % 2 + 1
+            drop_piece(board, row, col, piece)
+            if last_move_wins(board, row, col, piece) or is_full(board):
+                break
+        else:
+            positions.append(board)
+    return positions
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_minimax_matches_naive_search(depth):
+    for board in random_positions(12):
+        piece = board.moves % 2 + 1
+        expected = naive_minimax(board.copy(), depth, True, piece)
+        col, value = minimax(board.copy(), depth, -math.inf, math.inf, True, piece)
+        assert value == expected
+        assert child_value(board, col, depth, piece) == expected
+
+
+@pytest.mark.parametrize("ordering", ["none", "center", "full"])
+def test_table_and_ordering_keep_the_value(ordering):
+    depth = 4
+    for board in random_positions(6, seed=1):
+        piece = board.moves % 2 + 1
+        expected = naive_minimax(board.copy(), depth, True, piece)
+        col, value = minimax(board.copy(), depth, -math.inf, math.inf, True, piece,
+                             TranspositionTable(1 << 16 | 1),
+                             ordering=make_ordering(ordering))
+        assert value == expected
+        assert child_value(board, col, depth, piece) == expected
+
+
+def test_iterative_deepening_finds_a_win_in_one():
+    board = create_board()
+    for col in (0, 6, 0, 6, 0, 5):
+        drop_piece(board, get_next_open_row(board, col), col, board.moves % 2 + 1)
+    col, value = iterative_deepening(board, 1, 200, TranspositionTable(1 << 16 | 1))
+    assert col == 0
+    assert value == WIN_SCORE
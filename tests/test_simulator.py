@@ -0,0 +1,54 @@
+import numpy as np
+
+from engine.bitboard import (
+    create_board, drop_piece, get_next_open_row, get_valid_locations,
+    last_move_wins, is_full, to_array
+)
+from engine.evaluation import score_position
+from engine.simulator import (
+    DRAW, LockstepGames, greedy_policy, random_policy, simulate
+)
+
+
+def replay(columns):
+    # (board, winner) after playing the recorded columns one by one; winner
+    # is None for a game still going, and a win must come at the last column
+    board = create_board()
+    cols = [int(c) for c in columns if c >= 0]
+    for ply, col in enumerate(cols):
+        row = get_next_open_row(board, col)
+        piece = board.moves % 2 + 1
+        drop_piece(board, row, col, piece)
+        if last_move_wins(board, row, col, piece):
+            assert ply == len(cols) - 1
+            return board, piece
+    return board, DRAW if is_full(board) else None
+
+
+def test_games_match_a_replay():
+    rng = np.random.default_rng(0)
+    policies = (random_policy(rng), greedy_policy(rng=rng))
+    for lockstep in simulate(500, policies, random_plies=2, rng=rng, batch=200):
+        assert lockstep.done.all()
+        grids = lockstep.grids()
+        for i in range(len(lockstep)):
+            board, winner = replay(lockstep.columns[i])
+            assert lockstep.winners[i] == winner
+            assert lockstep.moves[i] == board.moves
+            assert np.array_equal(grids[i], to_array(board))
+
+
+def test_greedy_policy_takes_the_best_scored_child():
+    rng = np.random.default_rng(1)
+    lockstep = LockstepGames(50)
+    lockstep.play((random_policy(rng), random_policy(rng)), 6)
+    idx = np.flatnonzero(~lockstep.done & (lockstep.moves % 2 == 0))
+    cols = greedy_policy()(lockstep, idx, 1)
+    for i, col in zip(idx, cols):
+        board, _ = replay(lockstep.columns[i])
+        scores = {}
+        for c in get_valid_locations(board):
+            child = board.copy()
+            drop_piece(child, get_next_open_row(child, c), c, 1)
+            scores[c] = score_position(child, 1)
+        assert scores[col] == max(scores.values())
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from engine.bitboard import (
+    create_board, drop_piece, undo_piece, get_next_open_row,
+    get_valid_locations, last_move_wins
+)
+from engine.solver import CELLS, Solver, SolverBudgetExceeded
+
+
+def test_empty_board_does_not_hit_an_unused_cache_slot():
+    # the empty board's key is 0, as is every unused slot's; a hit there
+    # used to "solve" it at once as a loss for the first player
+    solver = Solver(cache_size=1009)
+    solver.node_limit = 2000
+    with pytest.raises(SolverBudgetExceeded):
+        solver.solve(create_board())
+
+
+def brute_force(board):
+    # exact score by trying every continuation, as the solver defines it
+    valid_locations = get_valid_locations(board)
+    if not valid_locations:
+        return 0
+    best = -CELLS
+    piece = board.moves % 2 + 1
+    for col in valid_locations:
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, piece)
+        if last_move_wins(board, row, col, piece):
+            score = (CELLS + 2 - board.moves) // 2
+        else:
+            score = -brute_force(board)
+        undo_piece(board, row, col, piece)
+        best = max(best, score)
+    return best
+
+
+def wins_at_once(board):
+    piece = board.moves % 2 + 1
+    for col in get_valid_locations(board):
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, piece)
+        won = last_move_wins(board, row, col, piece)
+        undo_piece(board, row, col, piece)
+        if won:
+            return True
+    return False
+
+
+def endgames(count, discs, seed=0):
+    # positions still in play once `discs` random discs are down, leaving
+    # out those the side to move wins at once
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board()
+        while board.moves < discs:
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            piece = board.moves % 2 + 1
+            drop_piece(board, row, col, piece)
+            if last_move_wins(board, row, col, piece):
+                break
+        else:
+            if not wins_at_once(board):
+                positions.append(board)
+    return positions
+
+
+def test_solver_matches_brute_force_on_endgames():
+    solver = Solver(cache_size=100003)
+    for board in endgames(40, 33):
+        expected = brute_force(board.copy())
+        assert solver.solve(board) == expected
+        col, score = solver.best_move(board)
+        assert score == expected
+        assert solver.column_scores(board)[col] == expected
@@ -0,0 +1,49 @@
+from engine.bitboard import create_board
+from engine.book import OpeningBook, build_book
+from engine.tournament import Agent, play_game, run_tournament, summarize
+
+
+def outcome(result):
+    # everything but the timings, which differ from run to run
+    return {k: v for k, v in result.items() if k != "time"}
+
+
+def test_a_game_depends_only_on_its_seed():
+    agent1, agent2 = Agent(depth=3, seed=1), Agent(depth=2, seed=2, epsilon=0.2)
+    first = play_game(agent1, agent2, seed=5, first=1)
+    again = play_game(agent1, agent2, seed=5, first=1)
+    assert outcome(first) == outcome(again)
+    assert first["first"] == 2
+
+
+def test_summary_counts_every_game():
+    results = run_tournament(Agent(depth=2, seed=1), Agent(depth=1, seed=2), 6)
+    summary = summarize(results)
+    assert [r["seed"] for r in results] == list(range(6))
+    assert summary["games"] == 6
+    assert summary["wins"] + summary["losses"] + summary["draws"] == 6
+    assert summary["avg_length"] == sum(len(r["moves"]) for r in results) / 6
+
+
+def test_worker_count_does_not_change_results():
+    agent1, agent2 = Agent(depth=3, seed=1), Agent(depth=2, seed=2, epsilon=0.1)
+    serial = run_tournament(agent1, agent2, 8, seed=10, workers=1)
+    pooled = run_tournament(agent1, agent2, 8, seed=10, workers=3)
+    assert [outcome(r) for r in pooled] == [outcome(r) for r in serial]
+
+
+def test_agent_plays_from_its_book_and_solver(tmp_path):
+    path = str(tmp_path / "book.bin")
+    build_book(path, 2, 2, workers=1)
+    book = OpeningBook(path)
+    opening = book.lookup(create_board())[0]
+    book.close()
+    agent = Agent(depth=2, seed=1, solver_nodes=2000, book=path)
+    result = play_game(agent, Agent(depth=2, seed=2), seed=0, first=0,
+                       random_plies=0)
+    # values are None for the moves minimax did not choose
+    assert result["moves"][0] == opening
+    assert result["values"][0] is None
+    assert result["values"][2] is None
+    assert None in result["values"][4::2]
+    assert result["values"][1] is not None